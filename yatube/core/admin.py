@@ -0,0 +1,93 @@
+from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+
+from .paginator import EstimatedCountPaginator
+
+
+class InstanceAutocompleteSelect(AutocompleteSelect):
+    """Автодополнение, которое берёт выбранный вариант из строки списка.
+
+    Стандартный виджет ищет подпись выбранного объекта отдельным
+    запросом, то есть по запросу на каждую строку list_editable.
+    """
+
+    instance_choice = None
+
+    def optgroups(self, name, value, attr=None):
+        selected = [
+            str(v) for v in value
+            if str(v) not in self.choices.field.empty_values
+        ]
+        if (self.instance_choice is None
+                or selected != [str(self.instance_choice[0])]):
+            return super().optgroups(name, value, attr)
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, '', '', False, 0))
+        option_value, label = self.instance_choice
+        options.append(
+            self.create_option(name, option_value, label, True, len(options))
+        )
+        return [(None, options, 0)]
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    """Настройки списков админки для больших таблиц.
+
+    Без COUNT(*) по всей таблице, связанные объекты списка выбираются
+    через list_select_related, а внешние ключи — через автодополнение.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    empty_value_display = '-пусто-'
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.get_autocomplete_fields(request):
+            kwargs.setdefault('widget', InstanceAutocompleteSelect(
+                db_field.remote_field, self.admin_site,
+                using=kwargs.get('using'),
+            ))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_changelist_formset(self, request, **kwargs):
+        formset = super().get_changelist_formset(request, **kwargs)
+        names = [
+            name for name in self.list_editable
+            if name in self.get_autocomplete_fields(request)
+        ]
+
+        class InstanceChoiceFormSet(formset):
+            def _construct_form(self, i, **kwargs):
+                form = super()._construct_form(i, **kwargs)
+                for name in names:
+                    widget = form.fields[name].widget
+                    widget = getattr(widget, 'widget', widget)
+                    related = getattr(form.instance, name)
+                    if related is not None:
+                        widget.instance_choice = (related.pk, str(related))
+                return form
+
+        return InstanceChoiceFormSet
+
+
+class BackgroundDeletionAdmin(admin.ModelAdmin):
+    """Удаление со страницы объекта уходит в фон, как и массовое.
+
+    Наследник задаёт schedule_deletion(request, obj). Страница
+    подтверждения не собирает каскад связанных объектов: именно его
+    обход и удаление долгие.
+    """
+
+    def schedule_deletion(self, request, obj):
+        raise NotImplementedError
+
+    def delete_model(self, request, obj):
+        self.schedule_deletion(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            self.schedule_deletion(request, obj)
+
+    def get_deleted_objects(self, objs, request):
+        return [str(obj) for obj in objs], {}, set(), []
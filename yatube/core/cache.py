@@ -0,0 +1,61 @@
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+LOCK_KEY = '{}:lock'
+
+
+def get_or_compute(key, compute, timeout, beta=1.0):
+    """Значение из кеша; при промахе — compute() одним воркером на ключ.
+
+    В кеше лежит тройка (значение, срок свежести, время вычисления).
+    Запись хранится на CACHE_STALE_TIMEOUT сек. дольше срока свежести:
+    пока один воркер под коротким замком пересчитывает значение,
+    остальные получают устаревшее. Незадолго до срока значение
+    пересчитывается заранее с вероятностью, растущей к концу срока
+    и со временем вычисления (XFetch), так что записи редко истекают
+    у всех одновременно. Замок и значение лежат в общем кеше, поэтому
+    это работает и между процессами.
+    """
+    entry = cache.get(key)
+    lock_key = LOCK_KEY.format(key)
+    if entry is not None:
+        value, expires, delta = entry
+        # 1 - random() лежит в (0, 1]: логарифм определён.
+        early = -delta * beta * math.log(1 - random.random())
+        if time.time() + early < expires:
+            return value
+        if not cache.add(lock_key, True, settings.CACHE_LOCK_TIMEOUT):
+            # Значение уже пересчитывает другой воркер.
+            return value
+    elif not cache.add(lock_key, True, settings.CACHE_LOCK_TIMEOUT):
+        entry = wait_for(key, lock_key)
+        if entry is not None:
+            return entry[0]
+        # Воркер с замком не успел: считаем сами, но замок не трогаем.
+        return compute()
+    try:
+        started = time.monotonic()
+        value = compute()
+        delta = time.monotonic() - started
+        cache.set(
+            key, (value, time.time() + timeout, delta),
+            timeout + settings.CACHE_STALE_TIMEOUT,
+        )
+    finally:
+        cache.delete(lock_key)
+    return value
+
+
+def wait_for(key, lock_key):
+    """Ждёт, пока другой воркер положит значение, не дольше замка."""
+    deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(settings.CACHE_LOCK_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None or cache.get(lock_key) is None:
+            return entry
+    return None
@@ -0,0 +1,162 @@
+import hashlib
+import threading
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from core.cache import wait_for
+
+COALESCE_KEY = 'coalesce:{}'
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+class Flight:
+    """Запрос, который сейчас выполняется; ждущие получат его результат."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+def shareable_request(request):
+    """Анонимный GET без сессии: ответ не зависит от посетителя."""
+    return (
+        request.method in ('GET', 'HEAD')
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and not request.user.is_authenticated
+    )
+
+
+class SharedStream:
+    """Потоковое тело ответа, которое копится для ждущих запросов.
+
+    Ведущий запрос получает части сразу; когда сервер закроет ответ,
+    finish получит всё тело или None, если оно отдано не до конца.
+    """
+
+    def __init__(self, content, finish):
+        self.content = content
+        self.finish = finish
+        self.chunks = []
+        self.complete = False
+
+    def __iter__(self):
+        for chunk in self.content:
+            self.chunks.append(chunk)
+            yield chunk
+        self.complete = True
+
+    def close(self):
+        finish, self.finish = self.finish, None
+        if finish is not None:
+            finish(b''.join(self.chunks) if self.complete else None)
+
+
+def shareable_response(request, response):
+    return not (response.status_code != 200 or response.cookies
+                or request.META.get('CSRF_COOKIE_USED'))
+
+
+def snapshot(request, response):
+    """(код, тело, заголовки) ответа или None, если делиться им нельзя."""
+    if response.streaming or not shareable_response(request, response):
+        return None
+    return response.status_code, response.content, list(response.items())
+
+
+def build_response(result):
+    # Каждому запросу — свой объект: middleware меняют ответ на месте.
+    status, content, headers = result
+    response = HttpResponse(content, status=status)
+    for header, value in headers:
+        response[header] = value
+    return response
+
+
+def flight_key(request):
+    path = f'{request.method}:{request.get_host()}{request.get_full_path()}'
+    return hashlib.sha1(path.encode()).hexdigest()
+
+
+def lead(key, request, view, args, kwargs):
+    """Выполняет представление для первого запроса в процессе.
+
+    С COALESCE_ACROSS_PROCESSES представление выполняется один раз
+    на все процессы: замок и готовый ответ лежат в общем кеше.
+    """
+    if not settings.COALESCE_ACROSS_PROCESSES:
+        return view(request, *args, **kwargs)
+    result_key = COALESCE_KEY.format(key)
+    lock_key = f'{result_key}:lock'
+    locked = cache.add(lock_key, True, settings.CACHE_LOCK_TIMEOUT)
+    if not locked:
+        result = wait_for(result_key, lock_key)
+        if result is not None:
+            return build_response(result)
+    try:
+        response = view(request, *args, **kwargs)
+        result = snapshot(request, response)
+        if result is not None:
+            cache.set(result_key, result, settings.COALESCE_RESULT_TIMEOUT)
+        return response
+    finally:
+        if locked:
+            cache.delete(lock_key)
+
+
+def land(key, flight, result):
+    flight.result = result
+    with _flights_lock:
+        del _flights[key]
+    flight.done.set()
+
+
+def coalesce(view):
+    """Одинаковые одновременные анонимные GET выполняются один раз.
+
+    Первый запрос с данным адресом выполняет представление, остальные
+    в том же процессе ждут его (не дольше COALESCE_TIMEOUT сек.)
+    и получают копию ответа. Потоковый ответ ведущий отдаёт как
+    обычно, а ждущие получают его тело целиком, когда поток закончится;
+    между процессами потоковые ответы не делятся. Ответы с cookie
+    и с CSRF-токеном не делятся: ждущие выполняют запрос сами.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not shareable_request(request):
+            return view(request, *args, **kwargs)
+        key = flight_key(request)
+        with _flights_lock:
+            flight = _flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _flights[key] = Flight()
+        if not leader:
+            if (flight.done.wait(settings.COALESCE_TIMEOUT)
+                    and flight.result is not None):
+                return build_response(flight.result)
+            return view(request, *args, **kwargs)
+        try:
+            response = lead(key, request, view, args, kwargs)
+        except BaseException:
+            land(key, flight, None)
+            raise
+        if response.streaming and shareable_response(request, response):
+            headers = list(response.items())
+
+            def finish(content):
+                land(key, flight, None if content is None else (
+                    200, content, headers
+                ))
+
+            response.streaming_content = SharedStream(
+                response.streaming_content, finish
+            )
+            return response
+        land(key, flight, snapshot(request, response))
+        return response
+    return wrapper
@@ -0,0 +1,153 @@
+import json
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class EventHub:
+    """Канал событий с одной подпиской на процесс.
+
+    Публикация кладёт событие в общий кеш под очередным номером.
+    В каждом процессе один фоновый поток раз в EVENTS_POLL_INTERVAL сек.
+    сверяет номер последнего события и будит ожидающих через
+    threading.Condition, так что подключённые клиенты не опрашивают
+    ни кеш, ни базу и в простое не тратят процессор.
+    """
+
+    def __init__(self, name, buffer_size=1000):
+        self.sequence_key = f'events:{name}:sequence'
+        self.event_key = f'events:{name}:{{}}'
+        self.condition = threading.Condition()
+        self.events = deque(maxlen=buffer_size)
+        self.sequence = None
+        self.listener = None
+        self.lock = threading.Lock()
+
+    def publish(self, payload):
+        # Нумерация начинается с текущего времени в мс: если ключ
+        # вытеснят из кеша, новые номера всё равно будут больше старых.
+        start = int(time.time() * 1000)
+        cache.add(self.sequence_key, start, None)
+        try:
+            sequence = cache.incr(self.sequence_key)
+        except ValueError:
+            # Ключ вытеснили между add и incr.
+            sequence = start + 1
+            cache.add(self.sequence_key, sequence, None)
+        cache.set(
+            self.event_key.format(sequence), payload,
+            getattr(settings, 'EVENTS_TTL', 60 * 5)
+        )
+        return sequence
+
+    def current(self):
+        """Номер последнего события; при первом вызове запускает поток."""
+        self.start()
+        with self.condition:
+            return self.sequence
+
+    def wait(self, after, timeout):
+        """Ждёт событий с номером больше after не дольше timeout сек.
+
+        Возвращает (номер последнего события, список payload).
+        """
+        self.start()
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.sequence != after, timeout=timeout
+            )
+            if self.sequence < after:
+                # Кеш очистили, и нумерация началась заново.
+                after = 0
+            payloads = [
+                payload for sequence, payload in self.events
+                if sequence > after
+            ]
+            return self.sequence, payloads
+
+    def start(self):
+        if self.listener is not None:
+            return
+        with self.lock:
+            if self.listener is not None:
+                return
+            self.sequence = cache.get(self.sequence_key) or 0
+            self.listener = threading.Thread(
+                target=self.listen, name='event-hub', daemon=True
+            )
+            self.listener.start()
+
+    def listen(self):
+        while True:
+            time.sleep(getattr(settings, 'EVENTS_POLL_INTERVAL', 1))
+            try:
+                self.poll()
+            except Exception:
+                # Недоступный кеш не должен убивать поток: попробуем снова.
+                continue
+
+    def poll(self):
+        latest = cache.get(self.sequence_key) or 0
+        with self.condition:
+            last = self.sequence
+            if latest < last:
+                # Кеш очистили: старые номера больше ничего не значат.
+                self.events.clear()
+                last = 0
+        if latest == last:
+            return
+        numbers = range(
+            max(last, latest - self.events.maxlen) + 1, latest + 1
+        )
+        found = cache.get_many([self.event_key.format(n) for n in numbers])
+        with self.condition:
+            for number in numbers:
+                payload = found.get(self.event_key.format(number))
+                if payload is not None:
+                    self.events.append((number, payload))
+            self.sequence = latest
+            self.condition.notify_all()
+
+
+def format_event(event=None, data=None, event_id=None, comment=None):
+    """Сообщение в формате text/event-stream."""
+    lines = []
+    if comment is not None:
+        lines.append(f': {comment}')
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event is not None:
+        lines.append(f'event: {event}')
+    if data is not None:
+        lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def event_stream(hub, since, accept, event):
+    """Отдаёт клиенту число новых событий, которые прошли фильтр accept.
+
+    Раз в EVENTS_HEARTBEAT сек. шлёт комментарий, чтобы прокси не
+    закрыли соединение; через EVENTS_STREAM_LIFETIME сек. поток
+    заканчивается, и браузер переподключается с Last-Event-ID.
+    """
+    heartbeat = getattr(settings, 'EVENTS_HEARTBEAT', 15)
+    deadline = time.monotonic() + getattr(
+        settings, 'EVENTS_STREAM_LIFETIME', 60 * 10
+    )
+    yield format_event(comment='connected')
+    last_write = time.monotonic()
+    while time.monotonic() < deadline:
+        sequence, payloads = hub.wait(
+            since, min(heartbeat, deadline - time.monotonic())
+        )
+        count = sum(1 for payload in payloads if accept(payload))
+        since = sequence
+        if count:
+            yield format_event(event, {'new': count}, event_id=sequence)
+            last_write = time.monotonic()
+        elif time.monotonic() - last_write >= heartbeat:
+            yield format_event(comment='ping')
+            last_write = time.monotonic()
@@ -0,0 +1,133 @@
+import mimetypes
+import os
+import re
+
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+# ManifestStaticFilesStorage добавляет к имени 12 символов md5,
+# а sorl-thumbnail и хранилище картинок называют файлы хешем целиком.
+HASHED_NAME = re.compile(r'(\.[0-9a-f]{12}\.|(^|/)[0-9a-f]{32,64}\.)[^/.]+$')
+BYTES_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+ACCEPTS_BR = re.compile(r'\bbr\b')
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+SHORT_LIVED = 'public, max-age=60'
+
+
+def is_hashed(path):
+    return bool(HASHED_NAME.search(path))
+
+
+def precompressed_variant(request, path):
+    """Выбирает заранее сжатую копию файла, которую принимает клиент."""
+    accept = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    for pattern, suffix, encoding in (
+        (ACCEPTS_BR, '.br', 'br'),
+        (ACCEPTS_GZIP, '.gz', 'gzip'),
+    ):
+        if pattern.search(accept) and os.path.isfile(path + suffix):
+            return path + suffix, encoding
+    return path, None
+
+
+def parse_range(request, size, etag):
+    """Возвращает (start, end) из заголовка Range или None для всего файла.
+
+    Поддерживается один диапазон; для невыполнимого бросает ValueError.
+    """
+    header = request.META.get('HTTP_RANGE', '')
+    match = BYTES_RANGE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range != etag:
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+def iter_range(path, start, end, block_size=64 * 1024):
+    with open(path, 'rb') as source:
+        source.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = source.read(min(block_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def range_response(request, path, size, etag, content_type):
+    try:
+        byte_range = parse_range(request, size, etag)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range is None:
+        return None
+    start, end = byte_range
+    response = StreamingHttpResponse(
+        iter_range(path, start, end), status=206, content_type=content_type
+    )
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = end - start + 1
+    return response
+
+
+def serve_file(request, path, cache_control=None, precompressed=False,
+               ranges=False, sendfile_header=None, sendfile_value=None,
+               content_type=None):
+    """Отдаёт файл с диска с поддержкой условных запросов.
+
+    FileResponse передаёт открытый файл в wsgi.file_wrapper, так что
+    сервер приложений может отправить его через sendfile без копирования.
+    Если задан sendfile_header (X-Accel-Redirect или X-Sendfile), тело
+    не отправляется вовсе: файл отдаёт фронтенд-сервер, он же обрабатывает
+    Range.
+    """
+    encoding = None
+    if precompressed:
+        source, encoding = precompressed_variant(request, path)
+    else:
+        source = path
+    stat = os.stat(source)
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}{encoding or ""}"'
+    content_type = content_type or (
+        mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    )
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if response is None and sendfile_header:
+        response = HttpResponse(content_type=content_type)
+        response[sendfile_header] = sendfile_value
+    if response is None and ranges:
+        response = range_response(
+            request, source, stat.st_size, etag, content_type
+        )
+    if response is None:
+        response = FileResponse(open(source, 'rb'), content_type=content_type)
+        if encoding:
+            response['Content-Encoding'] = encoding
+    if ranges:
+        response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = cache_control or (
+        IMMUTABLE if is_hashed(path) else SHORT_LIVED
+    )
+    if precompressed:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -0,0 +1,54 @@
+import re
+
+from django.conf import settings
+from django.template.loaders import app_directories, filesystem
+
+# Внутри этих тегов пробелы значимы, их не трогаем.
+PRESERVED = re.compile(r'(<(pre|textarea)\b.*?</\2>)', re.S | re.I)
+INDENT = re.compile(r'\s*\n\s*')
+
+
+def minify_html(source):
+    """Убирает отступы и пустые строки, сохраняя переводы строк."""
+    parts = PRESERVED.split(source)
+    # split с двумя группами возвращает [текст, блок, имя тега, текст, ...]
+    for index in range(0, len(parts), 3):
+        parts[index] = INDENT.sub('\n', parts[index])
+    return ''.join(
+        part for index, part in enumerate(parts) if index % 3 != 2
+    )
+
+
+def is_page_template(template_name):
+    """Шаблон страницы из TEMPLATE_MINIFY_PREFIXES, а не текст письма."""
+    return (
+        template_name.endswith('.html')
+        and not template_name.endswith('_email.html')
+        and template_name.startswith(
+            tuple(getattr(settings, 'TEMPLATE_MINIFY_PREFIXES', ()))
+        )
+    )
+
+
+class MinifyingMixin:
+    """Сжимает HTML страниц один раз при загрузке шаблона.
+
+    Вместе с cached.Loader это происходит при первой компиляции шаблона,
+    а не на каждый ответ. Письма вроде registration/*_email.html —
+    простой текст, в них переводы строк значимы.
+    """
+
+    def get_contents(self, origin):
+        contents = super().get_contents(origin)
+        if (getattr(settings, 'TEMPLATE_MINIFY_HTML', False)
+                and is_page_template(origin.template_name)):
+            return minify_html(contents)
+        return contents
+
+
+class FilesystemLoader(MinifyingMixin, filesystem.Loader):
+    pass
+
+
+class AppDirectoriesLoader(MinifyingMixin, app_directories.Loader):
+    pass
@@ -0,0 +1,206 @@
+import logging
+import os
+import pickle
+import smtplib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+logger = logging.getLogger(__name__)
+
+SUFFIX = '.msg'
+CLAIMED_SUFFIX = '.sending'
+
+
+def queue_path():
+    return getattr(
+        settings, 'EMAIL_QUEUE_PATH',
+        os.path.join(settings.BASE_DIR, 'mail_queue')
+    )
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Складывает письма в локальную очередь на диске и сразу возвращается.
+
+    Отправку выполняет команда ``send_queued_mail``.
+    """
+
+    def __init__(self, file_path=None, **kwargs):
+        super().__init__(**kwargs)
+        self.file_path = file_path or queue_path()
+        os.makedirs(self.file_path, exist_ok=True)
+
+    def send_messages(self, email_messages):
+        count = 0
+        for message in email_messages:
+            if not message.recipients():
+                continue
+            try:
+                self._enqueue(message)
+            except OSError:
+                if not self.fail_silently:
+                    raise
+                continue
+            count += 1
+        return count
+
+    def _enqueue(self, message):
+        # Соединение с бэкендом не сериализуется: воркер подставит своё.
+        message.connection = None
+        envelope = {'message': message, 'attempts': 0, 'next_try': 0}
+        name = f'{time.time():.6f}-{uuid.uuid4().hex}'
+        tmp_path = os.path.join(self.file_path, name + '.tmp')
+        with open(tmp_path, 'wb') as tmp:
+            pickle.dump(envelope, tmp)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        # rename атомарен: воркер никогда не увидит недописанный файл.
+        os.replace(tmp_path, os.path.join(self.file_path, name + SUFFIX))
+
+
+class MailQueue:
+    """Разбирает очередь писем пачками через одно SMTP-соединение."""
+
+    def __init__(self, path=None, backend=None, batch_size=None,
+                 max_attempts=None, backoff=None):
+        self.path = path or queue_path()
+        self.failed_path = os.path.join(self.path, 'failed')
+        self.backend = backend or getattr(
+            settings, 'EMAIL_QUEUE_DELIVERY_BACKEND',
+            'django.core.mail.backends.smtp.EmailBackend'
+        )
+        self.batch_size = batch_size or getattr(
+            settings, 'EMAIL_QUEUE_BATCH_SIZE', 50
+        )
+        self.max_attempts = max_attempts or getattr(
+            settings, 'EMAIL_QUEUE_MAX_ATTEMPTS', 5
+        )
+        self.backoff = backoff or getattr(settings, 'EMAIL_QUEUE_BACKOFF', 60)
+        # Неудачные подключения к серверу подряд и когда пробовать снова.
+        self.connect_failures = 0
+        self.paused_until = 0
+
+    def pending(self, stale_after=3600):
+        """Готовые к разбору письма в порядке постановки в очередь.
+
+        Захваченные упавшим воркером письма возвращаются в очередь.
+        """
+        names = []
+        try:
+            entries = list(os.scandir(self.path))
+        except FileNotFoundError:
+            return names
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            if entry.name.endswith(SUFFIX):
+                names.append(entry.name)
+            elif (entry.name.endswith(CLAIMED_SUFFIX)
+                  and entry.stat().st_mtime < time.time() - stale_after):
+                name = entry.name[:-len(CLAIMED_SUFFIX)] + SUFFIX
+                os.replace(entry.path, os.path.join(self.path, name))
+                names.append(name)
+        return sorted(names)
+
+    def _claim(self, name):
+        """Переименовывает файл, чтобы его не взял параллельный воркер."""
+        source = os.path.join(self.path, name)
+        claimed = source[:-len(SUFFIX)] + CLAIMED_SUFFIX
+        try:
+            os.rename(source, claimed)
+        except FileNotFoundError:
+            return None, None
+        try:
+            with open(claimed, 'rb') as claimed_file:
+                envelope = pickle.load(claimed_file)
+        except Exception:
+            # Битый конверт не отправить никогда: убираем его из очереди.
+            logger.exception('Не удалось прочитать письмо %s', name)
+            os.replace(claimed, self._failed_target(claimed))
+            return None, None
+        if envelope['next_try'] > time.time():
+            os.rename(claimed, source)
+            return None, None
+        return claimed, envelope
+
+    def _failed_target(self, claimed):
+        os.makedirs(self.failed_path, exist_ok=True)
+        name = os.path.basename(claimed)[:-len(CLAIMED_SUFFIX)]
+        return os.path.join(self.failed_path, name + SUFFIX)
+
+    def _release(self, claimed, envelope, error):
+        envelope['attempts'] += 1
+        envelope['error'] = repr(error)
+        if envelope['attempts'] >= self.max_attempts:
+            target = self._failed_target(claimed)
+        else:
+            envelope['next_try'] = (
+                time.time() + self.backoff * 2 ** (envelope['attempts'] - 1)
+            )
+            target = claimed[:-len(CLAIMED_SUFFIX)] + SUFFIX
+        with open(claimed, 'wb') as claimed_file:
+            pickle.dump(envelope, claimed_file)
+        os.replace(claimed, target)
+
+    def _send(self, connection, message):
+        try:
+            return connection.send_messages([message])
+        except (ConnectionError, smtplib.SMTPServerDisconnected):
+            # Сервер мог закрыть соединение между пачками: переоткрываем.
+            connection.close()
+            connection.open()
+            return connection.send_messages([message])
+
+    def _open(self):
+        """Открывает соединение; при ошибке откладывает следующую попытку.
+
+        Пауза удваивается с каждой неудачей подряд, как и у писем.
+        """
+        connection = get_connection(self.backend, fail_silently=False)
+        try:
+            connection.open()
+        except Exception:
+            self.connect_failures += 1
+            delay = self.backoff * 2 ** min(
+                self.connect_failures - 1, self.max_attempts
+            )
+            self.paused_until = time.time() + delay
+            logger.exception(
+                'Почтовый сервер недоступен, следующая попытка через %d сек.',
+                delay
+            )
+            return None
+        self.connect_failures = 0
+        return connection
+
+    def drain(self):
+        """Отправляет все готовые письма. Возвращает (sent, failed)."""
+        sent = failed = 0
+        if self.paused_until > time.time():
+            return sent, failed
+        names = self.pending()
+        if not names:
+            return sent, failed
+        connection = self._open()
+        if connection is None:
+            return sent, failed
+        try:
+            for start in range(0, len(names), self.batch_size):
+                for name in names[start:start + self.batch_size]:
+                    claimed, envelope = self._claim(name)
+                    if claimed is None:
+                        continue
+                    try:
+                        self._send(connection, envelope['message'])
+                    except Exception as error:
+                        self._release(claimed, envelope, error)
+                        failed += 1
+                    else:
+                        os.remove(claimed)
+                        sent += 1
+        finally:
+            connection.close()
+        return sent, failed
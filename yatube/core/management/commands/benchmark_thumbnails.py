@@ -0,0 +1,102 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageDraw
+from sorl.thumbnail.engines import pil_engine
+from sorl.thumbnail.parsers import parse_geometry
+
+from core.thumbnails import Engine, ThumbnailBackend
+
+ENGINES = {
+    'sorl': pil_engine.Engine,
+    'yatube': Engine,
+}
+OPTIONS = {
+    **ThumbnailBackend.default_options,
+    'crop': 'center', 'upscale': True, 'format': 'JPEG',
+}
+
+
+def sample_jpeg(width, height, seed):
+    """Синтетическое фото: градиент с фигурами, чтобы JPEG не был пустым."""
+    image = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+    draw = ImageDraw.Draw(image)
+    for step in range(20):
+        x, y = (seed * 97 + step * 131) % width, (step * 71) % height
+        draw.ellipse(
+            (x, y, x + width // 8, y + height // 8),
+            fill=(step * 12 % 256, seed * 40 % 256, 200),
+        )
+    content = BytesIO()
+    image.save(content, 'JPEG', quality=90)
+    return content.getvalue()
+
+
+def render(args):
+    engine_name, data, geometry_string = args
+    engine = ENGINES[engine_name]()
+    image = Image.open(BytesIO(data))
+    options = {**OPTIONS, 'image_info': image.info}
+    geometry = parse_geometry(
+        geometry_string, engine.get_image_ratio(image, options)
+    )
+    result = engine.create(image, geometry, options)
+    return len(engine._get_raw_data(
+        result, options['format'], options['quality'], image.info
+    ))
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает скорость движков миниатюр: изображений в секунду '
+        'на ядро для движка sorl по умолчанию и для core.thumbnails.Engine.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'files', nargs='*',
+            help='JPEG для замера; без них используются синтетические.',
+        )
+        parser.add_argument('--count', type=int, default=20)
+        parser.add_argument('--size', default='4000x3000')
+        parser.add_argument('--geometry', default='960x339')
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+
+    def handle(self, *args, **options):
+        if options['files']:
+            samples = []
+            for path in options['files']:
+                with open(path, 'rb') as sample:
+                    samples.append(sample.read())
+        else:
+            width, height = map(int, options['size'].split('x'))
+            samples = [
+                sample_jpeg(width, height, seed)
+                for seed in range(options['count'])
+            ]
+        for engine_name in ENGINES:
+            tasks = [
+                (engine_name, data, options['geometry']) for data in samples
+            ]
+            started = time.perf_counter()
+            for task in tasks:
+                render(task)
+            single = len(tasks) / (time.perf_counter() - started)
+            self.stdout.write(
+                f'{engine_name}: {single:.1f} изобр./с на ядро'
+            )
+        workers = options['workers']
+        tasks = [('yatube', data, options['geometry']) for data in samples]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Прогрев пула, чтобы не мерить запуск процессов.
+            list(executor.map(render, tasks[:workers]))
+            started = time.perf_counter()
+            list(executor.map(render, tasks))
+            total = len(tasks) / (time.perf_counter() - started)
+        self.stdout.write(
+            f'yatube, {workers} процесс(ов): {total:.1f} изобр./с, '
+            f'{total / workers:.1f} на ядро'
+        )
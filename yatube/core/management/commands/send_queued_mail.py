@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.mail import MailQueue
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из локальной очереди QueuedEmailBackend.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, а проверять очередь каждые --interval сек.',
+        )
+        parser.add_argument('--interval', type=float, default=5)
+        parser.add_argument('--batch-size', type=int)
+
+    def handle(self, *args, **options):
+        queue = MailQueue(batch_size=options['batch_size'])
+        while True:
+            try:
+                sent, failed = queue.drain()
+            except Exception as error:
+                # Воркер с --loop не должен падать из-за одной ошибки.
+                if not options['loop']:
+                    raise
+                self.stderr.write(f'Ошибка разбора очереди: {error!r}')
+                sent = failed = 0
+            if sent or failed:
+                self.stdout.write(f'Отправлено: {sent}, ошибок: {failed}')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,172 @@
+import os
+import re
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # без brotli ответы сжимаются только gzip
+    brotli = None
+
+from .files import ACCEPTS_BR, ACCEPTS_GZIP, serve_file
+from .sessions import clear_expired_sessions_in_background
+
+SESSION_CLEANUP_KEY = 'sessions:cleanup'
+
+
+class SessionCleanupMiddleware:
+    """Раз в SESSION_CLEANUP_INTERVAL секунд чистит истёкшие сессии.
+
+    Блокировка в общем кеше гарантирует, что за интервал очистку запустит
+    только один процесс; сама очистка идёт в фоновом потоке.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.interval = getattr(settings, 'SESSION_CLEANUP_INTERVAL', None)
+        if not self.interval:
+            raise MiddlewareNotUsed
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if cache.add(SESSION_CLEANUP_KEY, True, self.interval):
+            clear_expired_sessions_in_background()
+        return response
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную статику из STATIC_ROOT без обратного прокси.
+
+    Для хешированных имён ставит immutable Cache-Control, а сжатые при
+    collectstatic копии отдаёт клиентам, которые их принимают.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.root = settings.STATIC_ROOT
+        self.prefix = settings.STATIC_URL
+        if not self.root or not self.prefix.startswith('/'):
+            raise MiddlewareNotUsed
+
+    def __call__(self, request):
+        if (request.method in ('GET', 'HEAD')
+                and request.path_info.startswith(self.prefix)):
+            path = self.find(request.path_info[len(self.prefix):])
+            if path is not None:
+                return serve_file(request, path, precompressed=True)
+        return self.get_response(request)
+
+    def find(self, name):
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        return path if os.path.isfile(path) else None
+
+
+# text/event-stream не сжимаем: сжатие буферизует события.
+COMPRESSIBLE_TYPES = re.compile(
+    r'^(text/(?!event-stream)'
+    r'|application/(json|javascript|(atom|rss)\+xml|xml)|image/svg)'
+)
+
+
+class GzipCompressor:
+    encoding = 'gzip'
+
+    def __init__(self):
+        # wbits=31: поток в формате gzip, а не «сырой» zlib.
+        self.compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self.compressor.compress(data) + self.compressor.flush()
+
+    def process(self, chunk):
+        # SYNC_FLUSH отдаёт клиенту всё сжатое к этому моменту,
+        # не дожидаясь конца потока.
+        return (
+            self.compressor.compress(chunk)
+            + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+        )
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliCompressor:
+    encoding = 'br'
+
+    def __init__(self):
+        # Качество 5 — разумный компромисс для динамических ответов.
+        self.compressor = brotli.Compressor(quality=5)
+
+    def compress(self, data):
+        return self.compressor.process(data) + self.compressor.finish()
+
+    def process(self, chunk):
+        return self.compressor.process(chunk) + self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+def compress_stream(chunks, compressor):
+    for chunk in chunks:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware:
+    """Сжимает текстовые ответы brotli или gzip, в том числе потоковые.
+
+    Уже сжатые ответы (предсжатая статика, картинки) не трогает.
+    """
+
+    min_length = 200
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (response.has_header('Content-Encoding')
+                or not COMPRESSIBLE_TYPES.match(
+                    response.get('Content-Type', ''))):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressor = self.negotiate(request)
+        if compressor is None:
+            return response
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, compressor
+            )
+            del response['Content-Length']
+        else:
+            if len(response.content) < self.min_length:
+                return response
+            compressed = compressor.compress(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = compressor.encoding
+        return response
+
+    def negotiate(self, request):
+        accept = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if brotli is not None and ACCEPTS_BR.search(accept):
+            return BrotliCompressor()
+        if ACCEPTS_GZIP.search(accept):
+            return GzipCompressor()
+        return None
@@ -0,0 +1,87 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+
+def estimate_count(model, using='default'):
+    """Быстрая оценка числа строк в таблице без полного сканирования.
+
+    PostgreSQL и MySQL хранят оценку в статистике, для остальных баз
+    берётся максимальный первичный ключ — одно чтение индекса.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE relname = %s', [table]
+            )
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT table_rows FROM information_schema.tables '
+                'WHERE table_schema = DATABASE() AND table_name = %s',
+                [table]
+            )
+        else:
+            return model._default_manager.using(using).aggregate(
+                Max('pk')
+            )['pk__max'] or 0
+        row = cursor.fetchone()
+    return int(row[0]) if row and row[0] and row[0] > 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор для админки, не считающий COUNT(*) по всей таблице.
+
+    Для списка без фильтров число записей оценивается, и только
+    небольшие таблицы (меньше exact_threshold) считаются точно.
+    """
+
+    exact_threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if getattr(queryset, 'query', None) is None or queryset.query.where:
+            return super().count
+        estimate = estimate_count(queryset.model, queryset.db)
+        if estimate is None or estimate < self.exact_threshold:
+            return super().count
+        return estimate
+
+
+class ChainedSequence:
+    """Несколько выборок подряд как один список для Paginator.
+
+    count() складывает счётчики частей, срез читает только те части,
+    в которые попадает, — страница стоит не больше двух запросов.
+    """
+
+    def __init__(self, *parts):
+        self.parts = parts
+
+    @cached_property
+    def counts(self):
+        return [part.count() for part in self.parts]
+
+    def count(self):
+        return sum(self.counts)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start = key.start or 0
+        stop = self.count() if key.stop is None else key.stop
+        items = []
+        offset = 0
+        for part, size in zip(self.parts, self.counts):
+            if offset >= stop:
+                break
+            if start < offset + size:
+                items += part[max(start - offset, 0):min(stop - offset, size)]
+            offset += size
+        return items
@@ -0,0 +1,181 @@
+import hashlib
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import DEFAULT_DB_ALIAS, models, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+TABLE_VERSION_KEY = 'querycache:table:{}'
+QUERY_KEY = 'querycache:query:{}'
+
+# Таблицы моделей с CachingQuerySet: их изменения сбрасывают кеш.
+tracked_tables = set()
+# Таблицы, изменённые в текущей транзакции потока, по псевдонимам баз.
+_written = threading.local()
+
+
+def table_versions(tables):
+    keys = [TABLE_VERSION_KEY.format(table) for table in sorted(tables)]
+    versions = cache.get_many(keys)
+    if len(versions) < len(keys):
+        # Как и в core.events, счётчик начинается с текущего времени в мс:
+        # после вытеснения ключа старые версии не повторятся.
+        start = int(time.time() * 1000)
+        for key in set(keys) - set(versions):
+            cache.add(key, start, None)
+        versions = cache.get_many(keys)
+    return [versions.get(key) for key in keys]
+
+
+def bump_tables(*tables, using=DEFAULT_DB_ALIAS):
+    """Сбрасывает закешированные запросы ко всем указанным таблицам.
+
+    Версия растёт сразу и ещё раз после коммита: иначе другой воркер
+    мог бы закешировать данные до коммита под уже новой версией.
+    До конца транзакции запросы к этим таблицам не кешируются: в кеш
+    не попадут строки, которые потом откатятся.
+    """
+    _bump(tables)
+    if transaction.get_connection(using).in_atomic_block:
+        _written.__dict__.setdefault(using, set()).update(tables)
+    transaction.on_commit(lambda: _bump(tables), using=using)
+
+
+def written_tables(using):
+    """Таблицы, изменённые в ещё не завершённой транзакции."""
+    written = _written.__dict__.get(using)
+    if written and not transaction.get_connection(using).in_atomic_block:
+        written.clear()
+    return written or set()
+
+
+def _bump(tables):
+    for table in tables:
+        key = TABLE_VERSION_KEY.format(table)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Версии ещё нет: запросов к таблице в кеше тоже нет.
+            cache.add(key, int(time.time() * 1000), None)
+
+
+class CachingQuerySet(models.QuerySet):
+    """QuerySet, результаты которого можно кешировать через .cached().
+
+    Ключ — SQL с параметрами и версии всех таблиц запроса. Версия
+    таблицы растёт при post_save/post_delete/m2m_changed её моделей
+    и при update()/delete()/bulk_create() на этом QuerySet, так что
+    после записи все воркеры сразу видят новые данные. Запросы,
+    затрагивающие таблицы моделей без CachingQuerySet, не кешируются.
+    """
+
+    _cache_timeout = None
+
+    def cached(self, timeout=None):
+        clone = self._chain()
+        clone._cache_timeout = timeout or settings.QUERYSET_CACHE_TIMEOUT
+        return clone
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._cache_timeout = self._cache_timeout
+        return clone
+
+    def _cache_key(self, kind, query):
+        if self._cache_timeout is None or self._prefetch_related_lookups:
+            return None
+        query = query.clone()
+        try:
+            sql, params = query.get_compiler(using=self.db).as_sql()
+        except EmptyResultSet:
+            return None
+        # После компиляции в alias_map есть и таблицы select_related.
+        tables = {join.table_name for join in query.alias_map.values()}
+        tables.add(self.model._meta.db_table)
+        if not tables <= tracked_tables or tables & written_tables(self.db):
+            return None
+        raw = repr((
+            kind, self.db, self.model._meta.label, self._iterable_class,
+            self._fields, sql, params, table_versions(tables),
+        ))
+        return QUERY_KEY.format(hashlib.sha1(raw.encode()).hexdigest())
+
+    def _cached(self, kind, query, compute):
+        key = self._cache_key(kind, query)
+        if key is None:
+            return compute()
+        result = cache.get(key)
+        if result is None:
+            result = compute()
+            cache.set(key, result, self._cache_timeout)
+        return result
+
+    def _fetch_all(self):
+        if self._result_cache is None and self._cache_timeout is not None:
+            self._result_cache = self._cached('rows', self.query, lambda: [
+                *self._iterable_class(self)
+            ])
+        super()._fetch_all()
+
+    def iterator(self, chunk_size=2000):
+        if self._cache_timeout is None:
+            return super().iterator(chunk_size)
+        self._fetch_all()
+        return iter(self._result_cache)
+
+    def count(self):
+        if self._cache_timeout is None or self._result_cache is not None:
+            return super().count()
+        return self._cached('count', self.query, super().count)
+
+    def exists(self):
+        if self._cache_timeout is None or self._result_cache is not None:
+            return super().exists()
+        return self._cached('exists', self.query, super().exists)
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        bump_tables(self.model._meta.db_table, using=self.db)
+        return rows
+
+    update.alters_data = True
+
+    def delete(self):
+        result = super().delete()
+        bump_tables(self.model._meta.db_table, using=self.db)
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def bulk_create(self, *args, **kwargs):
+        objs = super().bulk_create(*args, **kwargs)
+        bump_tables(self.model._meta.db_table, using=self.db)
+        return objs
+
+
+def bump_instance_table(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    bump_tables(sender._meta.db_table, using=using)
+
+
+def connect_signals():
+    """Подключает сброс версий к моделям с CachingQuerySet.
+
+    Вызывается из CoreConfig.ready(). Сигналы подключаются только
+    к этим моделям: слушатель post_delete отключает быстрое удаление.
+    """
+    for model in apps.get_models():
+        if not issubclass(
+                model._default_manager._queryset_class, CachingQuerySet):
+            continue
+        tracked_tables.add(model._meta.db_table)
+        post_save.connect(bump_instance_table, sender=model)
+        post_delete.connect(bump_instance_table, sender=model)
+        for field in model._meta.local_many_to_many:
+            through = field.remote_field.through
+            tracked_tables.add(through._meta.db_table)
+            m2m_changed.connect(bump_instance_table, sender=through)
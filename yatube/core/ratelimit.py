@@ -0,0 +1,124 @@
+import math
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+RATE_LIMIT_KEY = 'ratelimit:{}:{}'
+WRITE_SLOT_KEY = 'ratelimit:write_slot:{}'
+# Замок корзины держится микросекунды; TTL страхует от упавшего процесса.
+BUCKET_LOCK_TIMEOUT = 1
+
+
+def poll(attempt, timeout):
+    """Повторяет attempt(), пока он не вернёт истину или не выйдет timeout."""
+    deadline = time.monotonic() + timeout
+    while True:
+        result = attempt()
+        if result or time.monotonic() >= deadline:
+            return result
+        time.sleep(settings.WRITE_QUEUE_POLL_INTERVAL)
+
+
+def take_token(key, burst, period):
+    """Берёт жетон из корзины в кеше. Возвращает (разрешено, ждать сек).
+
+    Корзина вмещает burst жетонов и наполняется со скоростью
+    burst / period в секунду. Жетоны и время пополнения читаются
+    и пишутся под замком (cache.add), поэтому параллельные запросы
+    клиента не получат один и тот же жетон.
+    """
+    lock_key = f'{key}:lock'
+    owner = uuid.uuid4().hex
+    if not poll(lambda: cache.add(lock_key, owner, BUCKET_LOCK_TIMEOUT),
+                settings.WRITE_QUEUE_TIMEOUT):
+        return False, BUCKET_LOCK_TIMEOUT
+    try:
+        now = time.time()
+        rate = burst / period
+        tokens, updated = cache.get(key) or (burst, now)
+        tokens = min(burst, tokens + (now - updated) * rate)
+        if tokens < 1:
+            return False, (1 - tokens) / rate
+        cache.set(key, (tokens - 1, now), math.ceil(period))
+        return True, 0
+    finally:
+        if cache.get(lock_key) == owner:
+            cache.delete(lock_key)
+
+
+def acquire_write_slot(timeout):
+    """Занимает свободный слот записи; None, если не дождались.
+
+    Слот — отдельный ключ со своим TTL WRITE_SLOTS_TIMEOUT: слоты
+    упавших процессов освобождаются сами, а счётчика, который мог бы
+    уйти в минус, нет.
+    """
+    owner = uuid.uuid4().hex
+
+    def attempt():
+        for number in range(settings.WRITE_CONCURRENCY_LIMIT):
+            key = WRITE_SLOT_KEY.format(number)
+            if cache.add(key, owner, settings.WRITE_SLOTS_TIMEOUT):
+                return key, owner
+        return None
+
+    return poll(attempt, timeout)
+
+
+def release_write_slot(slot):
+    key, owner = slot
+    # Слот мог истечь и достаться другому запросу: его не трогаем.
+    if cache.get(key) == owner:
+        cache.delete(key)
+
+
+def rejected(status, retry_after, reason):
+    response = HttpResponse(reason, status=status, content_type='text/plain')
+    response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def client_key(request):
+    if request.user.is_authenticated:
+        return request.user.pk
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def limit_writes(endpoint, methods=('POST',)):
+    """Допуск к пишущему представлению.
+
+    Сначала проверяет корзину жетонов пользователя для endpoint
+    (WRITE_RATE_LIMITS, 429 при превышении), затем общий лимит
+    одновременных записей (WRITE_CONCURRENCY_LIMIT, 503): лишние
+    записи отклоняются сразу, а не ждут блокировку SQLite.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return view(request, *args, **kwargs)
+            limit = settings.WRITE_RATE_LIMITS.get(endpoint)
+            if limit is not None:
+                allowed, retry_after = take_token(
+                    RATE_LIMIT_KEY.format(endpoint, client_key(request)),
+                    *limit
+                )
+                if not allowed:
+                    return rejected(
+                        429, retry_after, 'Слишком много запросов.'
+                    )
+            slot = acquire_write_slot(settings.WRITE_QUEUE_TIMEOUT)
+            if slot is None:
+                return rejected(
+                    503, settings.WRITE_RETRY_AFTER, 'Сервер перегружен.'
+                )
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                release_write_slot(slot)
+        return wrapper
+    return decorator
@@ -0,0 +1,20 @@
+import threading
+from importlib import import_module
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+
+
+def clear_expired_sessions():
+    """Удаляет истёкшие сессии, как команда clearsessions."""
+    engine = import_module(settings.SESSION_ENGINE)
+    try:
+        engine.SessionStore.clear_expired()
+    except (DatabaseError, NotImplementedError):
+        pass
+    finally:
+        connection.close()
+
+
+def clear_expired_sessions_in_background():
+    threading.Thread(target=clear_expired_sessions, daemon=True).start()
@@ -0,0 +1,155 @@
+import gzip
+import os
+import shutil
+import tempfile
+from xml.sax.saxutils import escape
+
+from django.contrib.sitemaps import Sitemap
+
+# Ограничения протокола sitemaps на один файл.
+MAX_URLS = 50000
+MAX_BYTES = 50 * 1024 * 1024
+INDEX_NAME = 'sitemap.xml'
+SHARD_NAME = 'sitemap-{section}-{number}.xml.gz'
+
+URLSET_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+URLSET_FOOTER = '</urlset>\n'
+
+
+class KeysetSitemap(Sitemap):
+    """Sitemap, который читает кортежи values_list пачками по pk.
+
+    Первым элементом кортежа всегда идёт pk, дальше — fields.
+    Модели не создаются, а смещение не растёт с номером страницы.
+    """
+
+    fields = ()
+    chunk_size = 2000
+
+    def queryset(self):
+        raise NotImplementedError
+
+    def items(self):
+        return self.queryset().order_by('pk').values_list('pk', *self.fields)
+
+    def iter_items(self):
+        items = self.items()
+        last = None
+        while True:
+            chunk = items if last is None else items.filter(pk__gt=last)
+            count = 0
+            for item in chunk[:self.chunk_size].iterator():
+                yield item
+                count += 1
+            if count < self.chunk_size:
+                return
+            last = item[0]
+
+
+def url_entry(sitemap, item, base_url):
+    """Элемент <url> и дата изменения записи (или None)."""
+    lines = [f'  <url><loc>{escape(base_url + sitemap.location(item))}</loc>']
+    lastmod = sitemap.lastmod(item) if hasattr(sitemap, 'lastmod') else None
+    if lastmod is not None:
+        lines.append(f'<lastmod>{lastmod.date().isoformat()}</lastmod>')
+    changefreq = getattr(sitemap, 'changefreq', None)
+    if changefreq:
+        lines.append(f'<changefreq>{changefreq}</changefreq>')
+    lines.append('</url>\n')
+    return ''.join(lines), lastmod
+
+
+class ShardWriter:
+    """Пишет один сжатый файл sitemap построчно, не держа его в памяти."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = gzip.open(path, 'wt', encoding='utf-8')
+        self.file.write(URLSET_HEADER)
+        self.count = 0
+        self.size = len(URLSET_HEADER) + len(URLSET_FOOTER)
+        self.lastmod = None
+
+    def full(self, entry):
+        return (self.count >= MAX_URLS
+                or self.size + len(entry.encode()) > MAX_BYTES)
+
+    def write(self, entry, lastmod):
+        self.file.write(entry)
+        self.count += 1
+        self.size += len(entry.encode())
+        if lastmod is not None and (
+                self.lastmod is None or lastmod > self.lastmod):
+            self.lastmod = lastmod
+
+    def close(self):
+        self.file.write(URLSET_FOOTER)
+        self.file.close()
+
+
+def write_section(sitemap, section, directory, base_url):
+    """Пишет раздел в файлы по MAX_URLS адресов; возвращает их писателей."""
+    shards = []
+    writer = None
+    for item in sitemap.iter_items():
+        entry, lastmod = url_entry(sitemap, item, base_url)
+        if writer is None or writer.full(entry):
+            if writer is not None:
+                writer.close()
+            name = SHARD_NAME.format(section=section, number=len(shards) + 1)
+            writer = ShardWriter(os.path.join(directory, name))
+            shards.append(writer)
+        writer.write(entry, lastmod)
+    if writer is not None:
+        writer.close()
+    return shards
+
+
+def write_index(path, shards, base_url):
+    with open(path, 'w', encoding='utf-8') as index:
+        index.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<sitemapindex '
+            'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        )
+        for shard in shards:
+            name = os.path.basename(shard.path)
+            index.write(
+                f'  <sitemap><loc>{escape(f"{base_url}/{name}")}</loc>'
+            )
+            if shard.lastmod is not None:
+                index.write(f'<lastmod>{shard.lastmod.isoformat()}</lastmod>')
+            index.write('</sitemap>\n')
+        index.write('</sitemapindex>\n')
+
+
+def write_sitemaps(sitemaps, root, base_url):
+    """Пишет файлы разделов и индекс sitemap.xml в каталог root.
+
+    Файлы собираются во временном каталоге и подменяются через
+    os.replace, поэтому посетители никогда не видят недописанный файл.
+    Возвращает список (имя файла, число адресов).
+    """
+    base_url = base_url.rstrip('/')
+    os.makedirs(root, exist_ok=True)
+    build = tempfile.mkdtemp(prefix='.build-', dir=root)
+    shards = []
+    try:
+        for section, sitemap in sitemaps.items():
+            if isinstance(sitemap, type):
+                sitemap = sitemap()
+            shards += write_section(sitemap, section, build, base_url)
+        write_index(os.path.join(build, INDEX_NAME), shards, base_url)
+        names = {os.path.basename(shard.path) for shard in shards}
+        for name in names | {INDEX_NAME}:
+            os.replace(os.path.join(build, name), os.path.join(root, name))
+        for entry in os.scandir(root):
+            if (entry.name.startswith('sitemap-')
+                    and entry.name not in names):
+                os.remove(entry.path)
+    finally:
+        shutil.rmtree(build, ignore_errors=True)
+    return [(os.path.basename(shard.path), shard.count) for shard in shards]
@@ -0,0 +1,88 @@
+import gzip
+import hashlib
+import os
+import posixpath
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.storage import FileSystemStorage
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него пишем только .gz
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.html', '.txt', '.xml', '.json', '.map', '.ico',
+)
+# Сжатая копия нужна, только если она заметно меньше оригинала.
+MIN_RATIO = 0.95
+
+
+def compressors():
+    yield '.gz', lambda data: gzip.compress(data, 9, mtime=0)
+    if brotli is not None:
+        yield '.br', lambda data: brotli.compress(data, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хеширует имена статики и при collectstatic кладёт рядом .gz и .br.
+
+    Если файла нет в манифесте (collectstatic ещё не запускали),
+    отдаётся исходное имя, а не ошибка.
+    """
+
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, *args, **kwargs):
+        yield from super().post_process(*args, **kwargs)
+        if kwargs.get('dry_run'):
+            return
+        for hashed_name in set(self.hashed_files.values()):
+            if hashed_name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(hashed_name)
+
+    def compress(self, name):
+        with self.open(name) as original:
+            data = original.read()
+        for suffix, compress in compressors():
+            compressed = compress(data)
+            if len(compressed) >= len(data) * MIN_RATIO:
+                continue
+            with open(self.path(name + suffix), 'wb') as target:
+                target.write(compressed)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Называет файлы по sha256 содержимого: ``<каталог>/ab/abcd….jpg``.
+
+    Одинаковые файлы хранятся один раз: если такой уже есть, повторная
+    загрузка ничего не пишет и возвращает имя существующего.
+    """
+
+    def content_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        directory = posixpath.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        hexdigest = digest.hexdigest()
+        return posixpath.join(
+            directory, hexdigest[:2], hexdigest + extension
+        )
+
+    def _save(self, name, content):
+        name = self.content_name(name, content)
+        if self.exists(name):
+            # Обновляем mtime, чтобы сборщик сирот не удалил файл,
+            # пока пост с новой ссылкой на него ещё не сохранён.
+            os.utime(self.path(name))
+            return name
+        # Если тот же файл параллельно пишет другой запрос, родитель
+        # сохранит копию под свободным именем: дубль, но не ошибка.
+        return super()._save(name, content)
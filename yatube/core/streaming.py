@@ -0,0 +1,140 @@
+import uuid
+from itertools import islice
+
+from django.conf import settings
+from django.core.paginator import Page
+from django.db.models.query import QuerySet
+from django.http import StreamingHttpResponse
+from django.shortcuts import render
+from django.template.defaulttags import ForNode
+from django.template.loader import render_to_string
+
+STREAM_CONTEXT_KEY = '_stream_collector'
+STREAM_BATCH_HOOKS_KEY = '_stream_batch_hooks'
+
+
+class StreamCollector:
+    """Собирает отложенные блоки {% stream %} при первом проходе шаблона."""
+
+    def __init__(self):
+        self.prefix = uuid.uuid4().hex
+        self.blocks = []
+
+    def defer(self, node, context):
+        marker = f'<!--stream:{self.prefix}:{len(self.blocks)}-->'
+        self.blocks.append((marker, node, context))
+        return marker
+
+    def iter_chunks(self, html):
+        for marker, node, context in self.blocks:
+            head, html = html.split(marker, 1)
+            yield head
+            yield from node.iter_render(context)
+        yield html
+
+
+def sized_iterable(values):
+    """Длина и итератор по значениям без загрузки страницы в память.
+
+    Для непрочитанной страницы пагинатора записи читаются через
+    QuerySet.iterator(), а длина берётся из уже посчитанного count.
+    """
+    if values is None:
+        return 0, []
+    if (isinstance(values, Page)
+            and isinstance(values.object_list, QuerySet)
+            and values.object_list._result_cache is None):
+        if not values.paginator.count:
+            return 0, []
+        length = values.end_index() - values.start_index() + 1
+        return length, values.object_list.iterator()
+    if not hasattr(values, '__len__'):
+        values = list(values)
+    return len(values), values
+
+
+def before_batches(context, objects, callback):
+    """Вызывать callback для каждой пачки objects, прочитанной потоком.
+
+    Работает внутри {% stream %}: там цикл по objects читает записи
+    по STREAMING_BATCH_SIZE и перед рендером пачки передаёт её
+    в callback. Вне потокового рендера возвращает False.
+    """
+    hooks = context.get(STREAM_BATCH_HOOKS_KEY)
+    if hooks is None:
+        return False
+    hooks.append((objects, callback))
+    return True
+
+
+def batched(values, callbacks):
+    if not callbacks:
+        yield from values
+        return
+    values = iter(values)
+    while True:
+        batch = list(islice(values, settings.STREAMING_BATCH_SIZE))
+        if not batch:
+            return
+        for callback in callbacks:
+            callback(batch)
+        yield from batch
+
+
+def iter_for(node, context):
+    """Построчный аналог ForNode.render: отдаёт по одной итерации."""
+    parentloop = context.get('forloop', {})
+    with context.push():
+        values = node.sequence.resolve(context, ignore_failures=True)
+        callbacks = [
+            callback for objects, callback
+            in context.get(STREAM_BATCH_HOOKS_KEY, ())
+            if objects is values
+        ]
+        length, values = sized_iterable(values)
+        if length < 1:
+            yield node.nodelist_empty.render(context)
+            return
+        if node.is_reversed:
+            values = reversed(list(values))
+        loop = context['forloop'] = {'parentloop': parentloop}
+        for index, item in enumerate(batched(values, callbacks)):
+            loop.update(
+                counter0=index,
+                counter=index + 1,
+                revcounter=length - index,
+                revcounter0=length - index - 1,
+                first=index == 0,
+                last=index == length - 1,
+            )
+            if len(node.loopvars) > 1:
+                with context.push(**dict(zip(node.loopvars, item))):
+                    yield node.nodelist_loop.render(context)
+            else:
+                context[node.loopvars[0]] = item
+                yield node.nodelist_loop.render(context)
+
+
+def iter_nodelist(nodelist, context):
+    with context.push({STREAM_BATCH_HOOKS_KEY: []}):
+        for node in nodelist:
+            if isinstance(node, ForNode):
+                yield from iter_for(node, context)
+            else:
+                yield node.render_annotated(context)
+
+
+def render_stream(request, template_name, context):
+    """Как render(), но отдаёт страницу потоком при STREAMING_RENDER.
+
+    Всё, что вне {% stream %}, рендерится сразу, и начало страницы
+    уходит клиенту до того, как из базы прочитан первый пост. Содержимое
+    блока {% stream %} рендерится по одной итерации цикла.
+    """
+    if not getattr(settings, 'STREAMING_RENDER', False):
+        return render(request, template_name, context)
+    collector = StreamCollector()
+    html = render_to_string(
+        template_name, {**context, STREAM_CONTEXT_KEY: collector}, request
+    )
+    return StreamingHttpResponse(collector.iter_chunks(html))
@@ -0,0 +1,51 @@
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+
+from core.cache import get_or_compute
+
+register = template.Library()
+
+
+class CachedNode(template.Node):
+    def __init__(self, nodelist, timeout, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.timeout = timeout
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        try:
+            timeout = int(self.timeout.resolve(context))
+        except (ValueError, TypeError):
+            raise template.TemplateSyntaxError(
+                f'"cached" tag got a non-integer timeout value: '
+                f'{self.timeout.var!r}'
+            )
+        key = make_template_fragment_key(
+            self.fragment_name,
+            [var.resolve(context) for var in self.vary_on],
+        )
+        return get_or_compute(
+            key, lambda: self.nodelist.render(context), timeout
+        )
+
+
+@register.tag
+def cached(parser, token):
+    """Как {% cache %}, но фрагмент пересчитывает только один воркер.
+
+    {% cached 20 index_page page_obj %}...{% endcached %}
+    """
+    nodelist = parser.parse(('endcached',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            f'"{tokens[0]}" tag requires at least 2 arguments.'
+        )
+    return CachedNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(token) for token in tokens[3:]],
+    )
@@ -0,0 +1,64 @@
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+from core.streaming import before_batches
+from core.thumbnails import prefetch_thumbnails as prefetch
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def prefetch_thumbnails(context, objects, geometry_string, **options):
+    """Одним запросом к кешу достаёт миниатюры картинок всех постов.
+
+    Использование:
+    {% prefetch_thumbnails page_obj "960x339" crop="center" %}
+    Опции должны совпадать с опциями тегов {% thumbnail %} ниже.
+    Внутри {% stream %} миниатюры достаются по пачкам, прочитанным
+    циклом, чтобы страница не загружалась целиком заранее.
+    """
+    def fetch(objects):
+        prefetch(
+            [getattr(obj, 'image', None) for obj in objects],
+            geometry_string, **options
+        )
+
+    if not before_batches(context, objects, fetch):
+        fetch(objects)
+    return ''
+
+
+def image_size(image):
+    """Размеры без чтения файла: из записи миниатюры sorl или из поста."""
+    size = getattr(image, 'size', None)
+    if isinstance(size, (list, tuple)) and len(size) == 2:
+        return size
+    instance = getattr(image, 'instance', None)
+    width = getattr(instance, 'image_width', None)
+    height = getattr(instance, 'image_height', None)
+    if width and height:
+        return width, height
+    return None, None
+
+
+@register.simple_tag
+def lazy_image(image, **attrs):
+    """<img> с размерами, loading="lazy" и decoding="async".
+
+    Принимает миниатюру из {% thumbnail %} или поле картинки поста;
+    остальные аргументы становятся атрибутами тега, в том числе можно
+    переопределить loading="eager" для картинки на первом экране.
+    """
+    width, height = image_size(image)
+    attrs = {
+        'src': image.url,
+        'width': width,
+        'height': height,
+        'loading': 'lazy',
+        'decoding': 'async',
+        **attrs,
+    }
+    return format_html('<img{}>', flatatt({
+        name: value for name, value in attrs.items() if value is not None
+    }))
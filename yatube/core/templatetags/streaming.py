@@ -0,0 +1,33 @@
+from django import template
+
+from core.streaming import STREAM_CONTEXT_KEY, iter_nodelist
+
+register = template.Library()
+
+
+class StreamNode(template.Node):
+    def __init__(self, nodelist):
+        self.nodelist = nodelist
+
+    def render(self, context):
+        collector = context.get(STREAM_CONTEXT_KEY)
+        if collector is None:
+            return self.nodelist.render(context)
+        # Блок отрендерится позже, когда начало страницы уже отправлено,
+        # поэтому сохраняем копию контекста на этот момент.
+        return collector.defer(self, context.new(context.flatten()))
+
+    def iter_render(self, context):
+        return iter_nodelist(self.nodelist, context)
+
+
+@register.tag
+def stream(parser, token):
+    """Содержимое блока при потоковом рендере отдаётся по частям.
+
+    Циклы {% for %} верхнего уровня внутри блока рендерятся
+    по одной итерации за раз.
+    """
+    nodelist = parser.parse(('endstream',))
+    parser.delete_first_token()
+    return StreamNode(nodelist)
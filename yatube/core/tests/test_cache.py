@@ -0,0 +1,69 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import SimpleTestCase, override_settings
+
+from core.cache import LOCK_KEY, get_or_compute
+
+
+@override_settings(CACHE_LOCK_POLL_INTERVAL=0.01, CACHE_LOCK_TIMEOUT=0.1)
+class GetOrComputeTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def test_value_is_cached(self):
+        self.assertEqual(get_or_compute('key', self.compute, 60), 1)
+        self.assertEqual(get_or_compute('key', self.compute, 60), 1)
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_value_is_served_while_locked(self):
+        """Пока другой воркер держит замок, отдаётся устаревшее значение."""
+        cache.set('key', ('старое', time.time() - 1, 0), 60)
+        cache.add(LOCK_KEY.format('key'), True)
+        self.assertEqual(get_or_compute('key', self.compute, 60), 'старое')
+        self.assertEqual(self.calls, 0)
+
+    def test_stale_value_is_refreshed_by_lock_holder(self):
+        cache.set('key', ('старое', time.time() - 1, 0), 60)
+        self.assertEqual(get_or_compute('key', self.compute, 60), 1)
+        self.assertIsNone(cache.get(LOCK_KEY.format('key')))
+
+    def test_early_refresh_near_expiry(self):
+        """XFetch: долгий пересчёт начинается до истечения срока."""
+        cache.set('key', ('старое', time.time() + 1, 10), 60)
+        with mock.patch('core.cache.random.random', return_value=0.9):
+            self.assertEqual(get_or_compute('key', self.compute, 60), 1)
+        cache.set('key', ('свежее', time.time() + 100, 0.01), 60)
+        with mock.patch('core.cache.random.random', return_value=0.9):
+            self.assertEqual(
+                get_or_compute('key', self.compute, 60), 'свежее'
+            )
+
+    def test_missing_value_waits_for_lock_holder(self):
+        """Без значения воркер ждёт того, кто держит замок."""
+        cache.add(LOCK_KEY.format('key'), True)
+        ready = threading.Timer(0.03, cache.set, [
+            'key', ('готово', time.time() + 60, 0), 60
+        ])
+        ready.start()
+        self.assertEqual(get_or_compute('key', self.compute, 60), 'готово')
+        ready.join()
+        self.assertEqual(self.calls, 0)
+
+    def test_cached_tag(self):
+        template = Template(
+            '{% load caching %}{% cached 60 fragment name %}'
+            '{{ value }}{% endcached %}'
+        )
+        first = template.render(Context({'name': 'a', 'value': 1}))
+        second = template.render(Context({'name': 'a', 'value': 2}))
+        other = template.render(Context({'name': 'b', 'value': 3}))
+        self.assertEqual((first, second, other), ('1', '1', '3'))
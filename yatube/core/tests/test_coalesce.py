@@ -0,0 +1,114 @@
+import threading
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.coalesce import COALESCE_KEY, coalesce, flight_key
+from core.streaming import render_stream
+
+
+class CoalesceTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+        self.factory = RequestFactory()
+
+    def slow_view(self, request):
+        self.calls += 1
+        time.sleep(0.2)
+        response = HttpResponse(f'ответ {self.calls}')
+        response['X-Test'] = 'yes'
+        return response
+
+    def request(self, path='/post/1/'):
+        request = self.factory.get(path)
+        request.user = AnonymousUser()
+        return request
+
+    def run_concurrently(self, view, count=5):
+        responses = [None] * count
+
+        def fetch(number):
+            response = view(self.request())
+            if response.streaming:
+                # Как WSGI-сервер: дочитываем поток и закрываем ответ.
+                content = b''.join(response.streaming_content)
+                response.close()
+                response = HttpResponse(content)
+            responses[number] = response
+
+        threads = [
+            threading.Thread(target=fetch, args=[number])
+            for number in range(count)
+        ]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.01)
+        for thread in threads:
+            thread.join()
+        return responses
+
+    def test_concurrent_requests_share_one_response(self):
+        responses = self.run_concurrently(coalesce(self.slow_view))
+        self.assertEqual(self.calls, 1)
+        for response in responses:
+            self.assertEqual(response.content.decode(), 'ответ 1')
+            self.assertEqual(response['X-Test'], 'yes')
+        # Каждый получил собственный объект ответа.
+        self.assertEqual(len({id(response) for response in responses}), 5)
+
+    @override_settings(STREAMING_RENDER=True)
+    def test_streamed_response_is_shared(self):
+        def view(request):
+            self.calls += 1
+            time.sleep(0.2)
+            return render_stream(request, 'core/404.html', {
+                'path': f'ответ {self.calls}'
+            })
+
+        responses = self.run_concurrently(coalesce(view))
+        self.assertEqual(self.calls, 1)
+        contents = {response.content for response in responses}
+        self.assertEqual(len(contents), 1)
+        self.assertIn('ответ 1', contents.pop().decode())
+
+    def test_sequential_requests_are_not_shared(self):
+        view = coalesce(self.slow_view)
+        view(self.request())
+        self.assertEqual(view(self.request()).content.decode(), 'ответ 2')
+
+    def test_authenticated_requests_are_not_coalesced(self):
+        request = self.request()
+        request.user = type('User', (), {'is_authenticated': True})()
+        view = coalesce(self.slow_view)
+        view(request)
+        view(request)
+        self.assertEqual(self.calls, 2)
+
+    def test_responses_with_cookies_are_not_shared(self):
+        def view(request):
+            response = self.slow_view(request)
+            response.set_cookie('visitor', '1')
+            return response
+
+        self.run_concurrently(coalesce(view), count=3)
+        self.assertEqual(self.calls, 3)
+
+    @override_settings(
+        COALESCE_ACROSS_PROCESSES=True, CACHE_LOCK_POLL_INTERVAL=0.01
+    )
+    def test_result_from_other_process(self):
+        """Пока замок держит другой процесс, его ответ берётся из кеша."""
+        key = COALESCE_KEY.format(flight_key(self.request()))
+        cache.add(f'{key}:lock', True)
+        ready = threading.Timer(0.05, cache.set, [
+            key, (200, b'from other process', [('X-Test', 'yes')]), 60
+        ])
+        ready.start()
+        response = coalesce(self.slow_view)(self.request())
+        ready.join()
+        self.assertEqual(self.calls, 0)
+        self.assertEqual(response.content, b'from other process')
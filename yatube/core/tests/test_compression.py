@@ -0,0 +1,104 @@
+import gzip
+from unittest import mock
+
+import brotli
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.http import HttpResponse, StreamingHttpResponse
+from django.template.loader import get_template
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from core.loaders import minify_html
+from core.middleware import CompressionMiddleware
+
+HTML = '<p>Тестовый пост</p>\n' * 100
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    def compress(self, response, accept='gzip', content_type='text/html'):
+        response['Content-Type'] = content_type
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_gzip(self):
+        """HTML сжимается gzip, если клиент его принимает."""
+        response = self.compress(HttpResponse(HTML))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content).decode(), HTML)
+
+    def test_brotli(self):
+        """Brotli предпочтительнее gzip, если клиент принимает оба."""
+        response = self.compress(HttpResponse(HTML), accept='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content).decode(), HTML)
+
+    def test_gzip_without_brotli(self):
+        """Без модуля brotli клиенту с br отдаётся gzip."""
+        with mock.patch('core.middleware.brotli', None):
+            response = self.compress(HttpResponse(HTML), accept='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content).decode(), HTML)
+
+    def test_streaming(self):
+        """Потоковый ответ сжимается по частям."""
+        response = self.compress(
+            StreamingHttpResponse(line for line in HTML.splitlines(True))
+        )
+        body = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body).decode(), HTML)
+        self.assertFalse(response.has_header('Content-Length'))
+
+    def test_streaming_brotli(self):
+        """Потоковый ответ сжимается brotli по частям."""
+        response = self.compress(
+            StreamingHttpResponse(line for line in HTML.splitlines(True)),
+            accept='br',
+        )
+        self.assertEqual(response['Content-Encoding'], 'br')
+        body = b''.join(response.streaming_content)
+        self.assertEqual(brotli.decompress(body).decode(), HTML)
+
+    def test_skipped_responses(self):
+        """Картинки, короткие и уже сжатые ответы не трогаются."""
+        cases = (
+            (HttpResponse(HTML), 'gzip', 'image/jpeg'),
+            (HttpResponse('<p></p>'), 'gzip', 'text/html'),
+            (HttpResponse(HTML), 'identity', 'text/html'),
+        )
+        for response, accept, content_type in cases:
+            with self.subTest(accept=accept, content_type=content_type):
+                response = self.compress(response, accept, content_type)
+                self.assertFalse(response.has_header('Content-Encoding'))
+
+
+class MinifyHtmlTests(SimpleTestCase):
+    def test_minify_keeps_pre(self):
+        source = (
+            '<div>\n    <p>\n      текст\n    </p>\n\n</div>\n'
+            '<pre>\n  x\n</pre>'
+        )
+        self.assertEqual(
+            minify_html(source),
+            '<div>\n<p>\nтекст\n</p>\n</div>\n<pre>\n  x\n</pre>',
+        )
+
+
+class TemplateMinifyTests(TestCase):
+    def test_pages_are_minified(self):
+        source = get_template('posts/index.html').template.source
+        self.assertNotIn('\n  ', source)
+
+    def test_reset_email_keeps_paragraphs(self):
+        """Текст письма для сброса пароля не сжимается."""
+        get_user_model().objects.create_user(
+            username='Ivan', email='ivan@example.com', password='pass'
+        )
+        self.client.post(
+            reverse('users:password_reset_form'),
+            {'email': 'ivan@example.com'},
+        )
+        self.assertEqual(len(mail.outbox), 1)
+        # Первый абзац отделён от следующего пустой строкой.
+        paragraphs = mail.outbox[0].body.strip().split('\n\n')
+        self.assertNotIn('\n', paragraphs[0])
@@ -0,0 +1,49 @@
+import json
+import threading
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from core.events import EventHub, event_stream
+
+
+@override_settings(EVENTS_POLL_INTERVAL=0.01)
+class EventHubTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.hub = EventHub('test')
+
+    def test_waiters_are_woken_by_one_listener(self):
+        """Все ожидающие получают событие от общего слушателя процесса."""
+        since = self.hub.current()
+        results = []
+        waiters = [
+            threading.Thread(
+                target=lambda: results.append(self.hub.wait(since, 5))
+            )
+            for _ in range(3)
+        ]
+        for waiter in waiters:
+            waiter.start()
+        sequence = self.hub.publish({'post': 1})
+        for waiter in waiters:
+            waiter.join()
+        self.assertEqual(results, [(sequence, [{'post': 1}])] * 3)
+
+    @override_settings(EVENTS_HEARTBEAT=0.05, EVENTS_STREAM_LIFETIME=0.5)
+    def test_stream_counts_accepted_events(self):
+        since = self.hub.current()
+        stream = event_stream(
+            self.hub, since, lambda payload: payload['post'] % 2, 'posts'
+        )
+        self.assertEqual(next(stream), ': connected\n\n')
+        for post in (1, 2, 3):
+            sequence = self.hub.publish({'post': post})
+        events = [chunk for chunk in stream if 'event: posts' in chunk]
+        # События могли прийти одной или несколькими пачками.
+        self.assertEqual(
+            sum(json.loads(event.split('data: ')[1])['new']
+                for event in events),
+            2
+        )
+        self.assertIn(f'id: {sequence}\n', events[-1])
@@ -0,0 +1,154 @@
+import os
+import shutil
+import socketserver
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.test import SimpleTestCase
+
+from core.mail import MailQueue, QueuedEmailBackend
+
+TEMP_QUEUE_PATH = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Минимальный SMTP-сервер: принимает письма и складывает их в список."""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 localhost')
+        data = None
+        for raw in self.rfile:
+            line = raw.decode().rstrip('\r\n')
+            if data is not None:
+                if line == '.':
+                    self.server.messages.append('\n'.join(data))
+                    data = None
+                    self.reply('250 OK')
+                else:
+                    data.append(line)
+                continue
+            command = line[:4].upper()
+            if command in ('EHLO', 'HELO'):
+                self.reply('250 localhost')
+            elif command == 'DATA':
+                data = []
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                break
+            else:
+                self.reply('250 OK')
+
+
+class SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.messages = []
+        self.connections = 0
+
+
+class MailQueueTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = SMTPServer()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        shutil.rmtree(TEMP_QUEUE_PATH, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.messages.clear()
+        self.server.connections = 0
+        shutil.rmtree(TEMP_QUEUE_PATH, ignore_errors=True)
+
+    def send(self, count):
+        connection = QueuedEmailBackend(file_path=TEMP_QUEUE_PATH)
+        return connection.send_messages([
+            mail.EmailMessage(
+                f'Тема {number}', 'Текст', 'from@example.com',
+                ['to@example.com']
+            )
+            for number in range(count)
+        ])
+
+    def test_backend_only_enqueues(self):
+        """Бэкенд не обращается к SMTP, а складывает письма в очередь."""
+        self.assertEqual(self.send(3), 3)
+        self.assertEqual(len(MailQueue(path=TEMP_QUEUE_PATH).pending()), 3)
+        self.assertEqual(self.server.messages, [])
+
+    def test_drain_uses_one_connection(self):
+        """Очередь разбирается пачками через одно соединение."""
+        self.send(5)
+        host, port = self.server.server_address
+        with self.settings(EMAIL_HOST=host, EMAIL_PORT=port):
+            queue = MailQueue(
+                path=TEMP_QUEUE_PATH,
+                backend='django.core.mail.backends.smtp.EmailBackend',
+                batch_size=2,
+            )
+            self.assertEqual(queue.drain(), (5, 0))
+        self.assertEqual(len(self.server.messages), 5)
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(queue.pending(), [])
+
+    def test_failed_delivery_is_retried_later(self):
+        """Недоставленное письмо остаётся в очереди с отложенным повтором."""
+        self.send(1)
+        queue = MailQueue(
+            path=TEMP_QUEUE_PATH,
+            backend='core.tests.test_mail.BrokenBackend',
+        )
+        self.assertEqual(queue.drain(), (0, 1))
+        self.assertEqual(len(queue.pending()), 1)
+        # Повтор ещё не наступил: письмо не берётся в работу.
+        self.assertEqual(queue.drain(), (0, 0))
+
+    def test_connection_error_pauses_queue(self):
+        """Если сервер недоступен, очередь ждёт, а письма остаются в ней."""
+        self.send(1)
+        queue = MailQueue(
+            path=TEMP_QUEUE_PATH,
+            backend='core.tests.test_mail.UnreachableBackend',
+        )
+        with self.assertLogs('core.mail', 'ERROR'):
+            self.assertEqual(queue.drain(), (0, 0))
+        self.assertGreater(queue.paused_until, 0)
+        self.assertEqual(len(queue.pending()), 1)
+
+    def test_corrupt_envelope_is_moved_to_failed(self):
+        self.send(1)
+        queue = MailQueue(path=TEMP_QUEUE_PATH, backend=(
+            'django.core.mail.backends.locmem.EmailBackend'
+        ))
+        name = queue.pending()[0]
+        with open(os.path.join(TEMP_QUEUE_PATH, name), 'wb') as envelope:
+            envelope.write(b'not a pickle')
+        with self.assertLogs('core.mail', 'ERROR'):
+            self.assertEqual(queue.drain(), (0, 0))
+        self.assertEqual(queue.pending(), [])
+        self.assertEqual(os.listdir(queue.failed_path), [name])
+
+
+class BrokenBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise OSError('SMTP недоступен')
+
+
+class UnreachableBackend(BaseEmailBackend):
+    def open(self):
+        raise ConnectionRefusedError('SMTP недоступен')
@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+THUMBNAIL = 'cache/ab/cd/0123456789abcdef0123456789abcdef.jpg'
+CONTENT = b'0123456789'
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ServeMediaTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        path = os.path.join(TEMP_MEDIA_ROOT, THUMBNAIL)
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as thumbnail:
+            thumbnail.write(CONTENT)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_full_file(self):
+        """Хешированный файл отдаётся целиком с immutable кешированием."""
+        response = self.client.get(settings.MEDIA_URL + THUMBNAIL)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_byte_ranges(self):
+        """Запрос диапазона отдаёт 206, невыполнимый диапазон — 416."""
+        url = settings.MEDIA_URL + THUMBNAIL
+        response = self.client.get(url, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(response.status_code, HTTPStatus.PARTIAL_CONTENT)
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+        response = self.client.get(url, HTTP_RANGE='bytes=-3')
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+        response = self.client.get(url, HTTP_RANGE='bytes=20-')
+        self.assertEqual(
+            response.status_code, HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+
+    @override_settings(MEDIA_SENDFILE_HEADER='X-Accel-Redirect')
+    def test_accel_redirect(self):
+        """С nginx впереди приложение отдаёт только заголовок."""
+        response = self.client.get(settings.MEDIA_URL + THUMBNAIL)
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/' + THUMBNAIL
+        )
+        self.assertEqual(response.content, b'')
+
+    def test_missing_and_outside_files(self):
+        for path in ('cache/missing.jpg', '../manage.py'):
+            with self.subTest(path=path):
+                response = self.client.get(settings.MEDIA_URL + path)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
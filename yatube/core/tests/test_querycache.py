@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TransactionTestCase
+from posts.forms import PostForm
+from posts.models import Follow, Group
+
+User = get_user_model()
+
+
+class CachedQuerySetTests(TransactionTestCase):
+    """Без обёртки TestCase: запросы в транзакции не кешируются."""
+
+    def setUp(self):
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.user = User.objects.create_user(username='Ivan')
+        self.author = User.objects.create_user(username='Petr')
+        cache.clear()
+
+    def test_results_are_cached(self):
+        querysets = (
+            lambda: Group.objects.cached().get(slug='group'),
+            lambda: list(Group.objects.cached()),
+            lambda: Group.objects.cached().filter(slug='other').exists(),
+        )
+        results = [queryset() for queryset in querysets]
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                [queryset() for queryset in querysets], results
+            )
+        self.assertEqual(results, [self.group, [self.group], False])
+
+    def test_save_and_delete_invalidate(self):
+        list(Group.objects.cached())
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertEqual(
+            Group.objects.cached().get(slug='group').title, 'Новое название'
+        )
+        Group.objects.filter(pk=self.group.pk).delete()
+        self.assertEqual(list(Group.objects.cached()), [])
+
+    def test_update_invalidates(self):
+        Group.objects.cached().get(slug='group')
+        Group.objects.filter(pk=self.group.pk).update(title='Через update')
+        self.assertEqual(
+            Group.objects.cached().get(slug='group').title, 'Через update'
+        )
+
+    def test_follow_exists_check(self):
+        author = User.objects.create_user(username='Anna')
+        follows = Follow.objects.filter(user=self.user, author=author)
+        self.assertFalse(follows.cached().exists())
+        Follow.objects.create(user=self.user, author=author)
+        self.assertTrue(follows.cached().exists())
+        # Каскад от удаления пользователя тоже сбрасывает версию.
+        author.delete()
+        self.assertFalse(follows.cached().exists())
+
+    def test_joins_with_untracked_tables_are_not_cached(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        follows = Follow.objects.select_related('author').cached()
+        list(follows)
+        with self.assertNumQueries(1):
+            list(follows.all())
+
+    def test_post_form_group_choices(self):
+        list(PostForm().fields['group'].choices)
+        with self.assertNumQueries(0):
+            choices = list(PostForm().fields['group'].choices)
+        self.assertEqual(choices[1][1], 'Группа')
+
+    def test_rolled_back_writes_are_not_cached(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                Group.objects.create(title='Откат', slug='rollback')
+                self.assertEqual(
+                    Group.objects.cached().filter(slug='rollback').count(), 1
+                )
+                raise RuntimeError
+        self.assertFalse(
+            Group.objects.cached().filter(slug='rollback').exists()
+        )
+        self.assertEqual(
+            Group.objects.cached().filter(slug='rollback').count(), 0
+        )
@@ -0,0 +1,65 @@
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.ratelimit import (RATE_LIMIT_KEY, WRITE_SLOT_KEY, limit_writes,
+                            take_token)
+
+
+@limit_writes('test')
+def write_view(request):
+    return HttpResponse('ok')
+
+
+@override_settings(WRITE_RATE_LIMITS={'test': (2, 60)}, WRITE_QUEUE_TIMEOUT=0)
+class LimitWritesTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def request(self, method='post'):
+        request = getattr(RequestFactory(), method)('/')
+        request.user = AnonymousUser()
+        return request
+
+    def test_rate_limit(self):
+        """После исчерпания корзины запись отклоняется с 429."""
+        for _ in range(2):
+            self.assertEqual(write_view(self.request()).status_code, 200)
+        response = write_view(self.request())
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+
+    def test_reads_are_not_limited(self):
+        for _ in range(5):
+            self.assertEqual(write_view(self.request('get')).status_code, 200)
+
+    def test_bucket_refills_gradually(self):
+        """Корзина, а не окно: жетон возвращается через period / burst."""
+        key = RATE_LIMIT_KEY.format('test', 'client')
+        with mock.patch('core.ratelimit.time.time', return_value=1000):
+            for _ in range(2):
+                self.assertEqual(take_token(key, 2, 60), (True, 0))
+            allowed, retry_after = take_token(key, 2, 60)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(retry_after, 30)
+        with mock.patch('core.ratelimit.time.time', return_value=1030):
+            self.assertTrue(take_token(key, 2, 60)[0])
+            self.assertFalse(take_token(key, 2, 60)[0])
+
+    def test_saturated_writes_are_shed(self):
+        """Когда все слоты записи заняты, запрос сразу получает 503."""
+        # Слоты заняты другими процессами: ключи лежат в кеше.
+        for number in range(4):
+            cache.set(WRITE_SLOT_KEY.format(number), 'other')
+        with self.settings(WRITE_CONCURRENCY_LIMIT=4):
+            response = write_view(self.request())
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(cache.get(WRITE_SLOT_KEY.format(0)), 'other')
+
+    def test_write_slot_is_released(self):
+        write_view(self.request())
+        self.assertIsNone(cache.get(WRITE_SLOT_KEY.format(0)))
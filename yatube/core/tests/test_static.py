@@ -0,0 +1,78 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+import brotli
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+TEMP_STATIC_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+CSS = b'body { margin: 0; }\n' * 100
+
+
+@override_settings(
+    STATICFILES_DIRS=[TEMP_STATIC_DIR],
+    STATIC_ROOT=TEMP_STATIC_ROOT,
+)
+class CompressedStaticFilesTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(TEMP_STATIC_DIR, 'css'))
+        path = os.path.join(TEMP_STATIC_DIR, 'css', 'site.css')
+        with open(path, 'wb') as css:
+            css.write(CSS)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_STATIC_DIR, ignore_errors=True)
+        shutil.rmtree(TEMP_STATIC_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.hashed = staticfiles_storage.stored_name('css/site.css')
+
+    def test_collectstatic_writes_gzip_copy(self):
+        """collectstatic кладёт рядом с хешированным файлом .gz копию."""
+        self.assertNotEqual(self.hashed, 'css/site.css')
+        path = os.path.join(TEMP_STATIC_ROOT, self.hashed + '.gz')
+        with gzip.open(path) as compressed:
+            self.assertEqual(compressed.read(), CSS)
+
+    def test_collectstatic_writes_brotli_copy(self):
+        """Рядом с .gz лежит и .br копия того же файла."""
+        path = os.path.join(TEMP_STATIC_ROOT, self.hashed + '.br')
+        with open(path, 'rb') as compressed:
+            self.assertEqual(brotli.decompress(compressed.read()), CSS)
+
+    def test_middleware_serves_brotli(self):
+        """Клиенту, принимающему br, отдаётся .br копия."""
+        response = self.client.get(
+            settings.STATIC_URL + self.hashed,
+            HTTP_ACCEPT_ENCODING='gzip, br',
+        )
+        self.assertEqual(response['Content-Encoding'], 'br')
+        body = b''.join(response.streaming_content)
+        self.assertEqual(brotli.decompress(body), CSS)
+
+    def test_middleware_serves_precompressed(self):
+        """Хешированный файл отдаётся сжатым и с immutable кешированием."""
+        response = self.client.get(
+            settings.STATIC_URL + self.hashed, HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        body = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body), CSS)
+        response = self.client.get(
+            settings.STATIC_URL + self.hashed,
+            HTTP_IF_NONE_MATCH=response['ETag'],
+            HTTP_ACCEPT_ENCODING='gzip',
+        )
+        self.assertEqual(response.status_code, 304)
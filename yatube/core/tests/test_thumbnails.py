@@ -0,0 +1,87 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from PIL import Image
+from sorl.thumbnail import default, get_thumbnail
+
+from core.thumbnails import generate_thumbnails, prefetch_thumbnails
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailKVStoreTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.names = []
+        for color in ('red', 'green', 'blue'):
+            content = BytesIO()
+            Image.new('RGB', (40, 20), color).save(content, 'PNG')
+            self.names.append(default_storage.save(
+                f'posts/{color}.png', ContentFile(content.getvalue())
+            ))
+        self.thumbnails = [
+            get_thumbnail(name, '10x10', crop='center')
+            for name in self.names
+        ]
+        self.forget()
+
+    def forget(self):
+        cache.clear()
+        default.kvstore.local.clear()
+
+    def test_prefetch_loads_page_in_one_query(self):
+        """После prefetch теги миниатюр не ходят ни в БД, ни в хранилище."""
+        with self.assertNumQueries(1):
+            prefetch_thumbnails(self.names, '10x10', crop='center')
+        cache.clear()
+        with self.assertNumQueries(0):
+            for name, thumbnail in zip(self.names, self.thumbnails):
+                cached = get_thumbnail(name, '10x10', crop='center')
+                self.assertEqual(cached.url, thumbnail.url)
+                self.assertEqual(cached.size, [10, 10])
+
+    def test_lru_serves_repeated_lookups(self):
+        get_thumbnail(self.names[0], '10x10', crop='center')
+        cache.clear()
+        with self.assertNumQueries(0):
+            get_thumbnail(self.names[0], '10x10', crop='center')
+
+    def test_lazy_image_has_intrinsic_size(self):
+        html = Template(
+            '{% load images %}{% lazy_image im class="card-img" %}'
+        ).render(Context({'im': self.thumbnails[0]}))
+        self.assertHTMLEqual(
+            html,
+            f'<img src="{self.thumbnails[0].url}" width="10" height="10" '
+            'loading="lazy" decoding="async" class="card-img">'
+        )
+
+    def test_generate_several_sizes_from_one_decode(self):
+        content = BytesIO()
+        Image.new('RGB', (1600, 1200), 'navy').save(content, 'JPEG')
+        name = default_storage.save(
+            'posts/photo.jpg', ContentFile(content.getvalue())
+        )
+        created = list(generate_thumbnails(
+            [name], ['960x339', '100x100'], workers=0, crop='center'
+        ))
+        self.assertEqual(created, [2])
+        with self.assertNumQueries(0):
+            large = get_thumbnail(name, '960x339', crop='center')
+            small = get_thumbnail(name, '100x100', crop='center')
+        self.assertEqual(large.size, [960, 339])
+        self.assertEqual(small.size, [100, 100])
+        with Image.open(default_storage.open(large.name)) as image:
+            self.assertEqual(image.size, (960, 339))
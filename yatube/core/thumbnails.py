@@ -0,0 +1,273 @@
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from django import db
+from django.conf import settings
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend as BaseThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.engines import pil_engine
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+from sorl.thumbnail.parsers import parse_geometry
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """Потокобезопасный LRU в памяти процесса с временем жизни записей."""
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self.data[key]
+                return None
+            self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = (value, time.monotonic() + self.timeout)
+            self.data.move_to_end(key)
+            while len(self.data) > self.size:
+                self.data.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+class KVStore(cached_db_kvstore.KVStore):
+    """Хранилище метаданных миниатюр sorl-thumbnail с LRU перед кешем.
+
+    Порядок поиска: память процесса, общий кеш, таблица KVStore.
+    В записи миниатюры лежат её размеры, так что для готовой миниатюры
+    шаблон не обращается ни к кешу, ни к файловому хранилищу.
+    В LRU попадают только найденные записи: отсутствие миниатюры
+    в одном процессе не должно скрывать её, когда другой её создаст.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.local = LRUCache(
+            getattr(settings, 'THUMBNAIL_LRU_SIZE', 1000),
+            getattr(settings, 'THUMBNAIL_LRU_TIMEOUT', 60),
+        )
+
+    def _get_raw(self, key):
+        value = self.local.get(key)
+        if value is None:
+            value = super()._get_raw(key)
+            if value is not None:
+                self.local.set(key, value)
+        return value
+
+    def _set_raw(self, key, value):
+        super()._set_raw(key, value)
+        self.local.set(key, value)
+
+    def _delete_raw(self, *keys):
+        super()._delete_raw(*keys)
+        for key in keys:
+            self.local.delete(key)
+
+    def clear(self, delete_thumbnails=False):
+        super().clear(delete_thumbnails)
+        self.local.clear()
+
+    def prefetch(self, image_files):
+        """Загружает записи пачкой: один get_many и не больше одного SQL."""
+        keys = {
+            add_prefix(image_file.key) for image_file in image_files
+        }
+        keys = [key for key in keys if self.local.get(key) is None]
+        if not keys:
+            return
+        found = self.cache.get_many(keys)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            stored = dict(KVStoreModel.objects.filter(
+                key__in=missing
+            ).values_list('key', 'value'))
+            # Как и родитель, запоминаем в кеше и отсутствие записи.
+            self.cache.set_many(
+                {
+                    key: stored.get(key, cached_db_kvstore.EMPTY_VALUE)
+                    for key in missing
+                },
+                thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT,
+            )
+            found.update(stored)
+        for key, value in found.items():
+            if value != cached_db_kvstore.EMPTY_VALUE:
+                self.local.set(key, value)
+
+
+class ThumbnailBackend(BaseThumbnailBackend):
+    """Умеет вычислить файл миниатюры, не обращаясь к хранилищу."""
+
+    def thumbnail_options(self, source, options):
+        # Повторяет подготовку опций из get_thumbnail: имя миниатюры
+        # зависит от полного набора опций.
+        options = dict(options)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        return options
+
+    def thumbnail_file(self, file_, geometry_string, **options):
+        source = ImageFile(file_)
+        options = self.thumbnail_options(source, options)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+
+class Engine(pil_engine.Engine):
+    """PIL-движок, который не декодирует оригинал в полном размере.
+
+    JPEG открывается в draft-режиме: декодер сразу отдаёт картинку,
+    уменьшенную в 2, 4 или 8 раз, но не меньше нужного размера. Для
+    остальных форматов resize сначала быстро сжимает картинку в целое
+    число раз (reducing_gap) и только потом применяет фильтр.
+    """
+
+    def create(self, image, geometry, options):
+        self.draft(image, geometry, options)
+        return super().create(image, geometry, options)
+
+    def draft(self, image, geometry, options):
+        if image.format != 'JPEG' or options.get('cropbox'):
+            return
+        x_image, y_image = self.get_image_size(image)
+        # Поворот по EXIF ещё не применён: берём коэффициент с запасом
+        # для обеих ориентаций.
+        factor = max(
+            self._calculate_scaling_factor(
+                x_image, y_image, geometry, options
+            ),
+            self._calculate_scaling_factor(
+                x_image, y_image, geometry[::-1], options
+            ),
+        )
+        # Дополнительные разрешения (@2x) рисуются из того же декодирования.
+        factor *= max(
+            thumbnail_settings.THUMBNAIL_ALTERNATIVE_RESOLUTIONS, default=1
+        )
+        if factor < 1:
+            image.draft(image.mode, (
+                math.ceil(x_image * factor), math.ceil(y_image * factor)
+            ))
+
+    def _scale(self, image, width, height):
+        return image.resize(
+            (width, height),
+            resample=Image.ANTIALIAS,
+            reducing_gap=getattr(settings, 'THUMBNAIL_REDUCING_GAP', 3.0),
+        )
+
+
+def render_thumbnails(file_, geometries, options):
+    """Рисует миниатюры нескольких размеров из одного декодирования.
+
+    Пропускает уже готовые миниатюры. Возвращает число созданных.
+    """
+    backend, engine, kvstore = default.backend, default.engine, default.kvstore
+    source = ImageFile(file_)
+    options = backend.thumbnail_options(source, options)
+    targets = []
+    for geometry_string in geometries:
+        name = backend._get_thumbnail_filename(
+            source, geometry_string, options
+        )
+        thumbnail = ImageFile(name, default.storage)
+        if not kvstore.get(thumbnail):
+            targets.append((geometry_string, thumbnail))
+    if not targets:
+        return 0
+    image = engine.get_image(source)
+    source.set_size(engine.get_image_size(image))
+    ratio = engine.get_image_ratio(image, options)
+    targets = sorted(
+        (
+            (parse_geometry(geometry_string, ratio), thumbnail)
+            for geometry_string, thumbnail in targets
+        ),
+        key=lambda target: target[0][0] * target[0][1],
+        reverse=True,
+    )
+    # Первым идёт самый крупный размер: draft подбирается под него,
+    # остальные уменьшаются из уже загруженной картинки.
+    item_options = {**options, 'image_info': engine.get_image_info(image)}
+    try:
+        for geometry, thumbnail in targets:
+            result = engine.create(image, geometry, item_options)
+            engine.write(result, item_options, thumbnail)
+            thumbnail.set_size(engine.get_image_size(result))
+            kvstore.get_or_set(source)
+            kvstore.set(thumbnail, source)
+    finally:
+        engine.cleanup(image)
+    return len(targets)
+
+
+def _render_safely(args):
+    try:
+        return render_thumbnails(*args)
+    except Exception:
+        logger.exception('Не удалось создать миниатюры для %s', args[0])
+        return 0
+
+
+def generate_thumbnails(files, geometries, workers=None, **options):
+    """Создаёт миниатюры для файлов в пуле процессов.
+
+    workers=0 — в текущем процессе, None — по числу ядер.
+    Отдаёт число созданных миниатюр для каждого файла.
+    """
+    tasks = ((file_, geometries, options) for file_ in files if file_)
+    if workers == 0:
+        yield from map(_render_safely, tasks)
+        return
+    # Дочерние процессы не должны делить с родителем открытые соединения.
+    db.connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_render_safely, tasks, chunksize=8)
+
+
+def prefetch_thumbnails(files, geometry_string, **options):
+    """Заранее достаёт записи о миниатюрах для всех картинок страницы."""
+    kvstore, backend = default.kvstore, default.backend
+    if not (hasattr(kvstore, 'prefetch')
+            and hasattr(backend, 'thumbnail_file')):
+        return
+    kvstore.prefetch([
+        backend.thumbnail_file(file_, geometry_string, **options)
+        for file_ in files if file_
+    ])
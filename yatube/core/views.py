@@ -1,4 +1,13 @@
+import os
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404
 from django.shortcuts import render
+from django.utils._os import safe_join
+
+from .files import serve_file
 
 
 def page_not_found(request, exception):
@@ -11,3 +20,41 @@ def csrf_failure(request, reason=''):
 
 def server_error(request):
     return render(request, 'core/500.html', {'path': request.path}, status=500)
+
+
+def serve_media(request, path):
+    """Отдаёт загруженные файлы из MEDIA_ROOT в production.
+
+    При настроенном MEDIA_SENDFILE_HEADER передача файла отдаётся
+    фронтенд-серверу через X-Accel-Redirect (nginx) или X-Sendfile.
+    """
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+    header = settings.MEDIA_SENDFILE_HEADER
+    if header == 'X-Accel-Redirect':
+        value = settings.MEDIA_ACCEL_REDIRECT_PREFIX + quote(path)
+    else:
+        value = fullpath
+    return serve_file(
+        request, fullpath, ranges=True,
+        sendfile_header=header, sendfile_value=value,
+    )
+
+
+def serve_sitemap(request, name):
+    """Отдаёт файлы, записанные командой generate_sitemaps."""
+    try:
+        fullpath = safe_join(settings.SITEMAP_ROOT, name)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+    # Разделы лежат сжатыми: отдаём их как gzip-файл, а не как XML.
+    content_type = (
+        'application/gzip' if name.endswith('.gz') else 'application/xml'
+    )
+    return serve_file(request, fullpath, content_type=content_type)
@@ -0,0 +1,58 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.base import BaseHandler
+from django.db import connection
+from django.test import RequestFactory
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupHandler(BaseHandler):
+    """Обработчик запросов со всеми middleware, но без WSGI-сервера."""
+
+    def __init__(self):
+        super().__init__()
+        self.load_middleware()
+
+
+def fetch(handler, factory, url):
+    """Выполняет анонимный GET и дочитывает ответ; отдаёт код ответа.
+
+    Потоковые ответы тоже читаются до конца: фрагменты страницы
+    кешируются только во время рендеринга.
+    """
+    try:
+        response = handler.get_response(factory.get(url))
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        response.close()
+        return response.status_code
+    except Exception:
+        logger.exception('Не удалось прогреть %s', url)
+        return None
+
+
+def warm_urls(urls, host, workers=4):
+    """Запрашивает адреса в пуле из workers потоков.
+
+    workers=0 — по очереди в текущем потоке. Отдаёт пары
+    (адрес, код ответа или None при ошибке) в порядке адресов.
+    """
+    handler = WarmupHandler()
+    factory = RequestFactory(HTTP_HOST=host)
+    if workers == 0:
+        for url in urls:
+            yield url, fetch(handler, factory, url)
+        return
+
+    def fetch_in_thread(url):
+        try:
+            return fetch(handler, factory, url)
+        finally:
+            # У каждого потока пула своё соединение с базой.
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        yield from zip(urls, executor.map(fetch_in_thread, urls))
@@ -1,24 +1,172 @@
 from django.contrib import admin
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.template.response import TemplateResponse
 
-from .models import Comment, Group, Post, Follow
+from core.admin import BackgroundDeletionAdmin, ScalableAdmin
 
+from .bulk import enqueue, schedule_group_deletion
+from .forms import MoveToGroupForm, ReassignAuthorForm
+from .models import (ArchivedPost, BulkOperation, Comment, Follow, Group,
+                     Post)
 
-class PostAdmin(admin.ModelAdmin):
+
+def queue_operation(modeladmin, request, queryset, action, params=None):
+    operation = enqueue(queryset, action, params, request.user)
+    modeladmin.message_user(
+        request,
+        f'Операция «{operation}» поставлена в очередь, '
+        f'записей: {operation.total}.'
+    )
+
+
+def bulk_delete(modeladmin, request, queryset):
+    queue_operation(modeladmin, request, queryset, BulkOperation.DELETE)
+
+
+bulk_delete.short_description = 'Удалить выбранные записи (фоном)'
+
+
+def form_action(name, description, form_class, action, param):
+    """Действие, которое сначала спрашивает параметр на отдельной форме."""
+    def admin_action(modeladmin, request, queryset):
+        form = form_class(request.POST if 'apply' in request.POST else None)
+        if form.is_valid():
+            queue_operation(
+                modeladmin, request, queryset, action,
+                {param: form.cleaned_data[param].pk},
+            )
+            return None
+        return TemplateResponse(
+            request, 'admin/posts/bulk_operation_form.html', {
+                **modeladmin.admin_site.each_context(request),
+                'title': description,
+                'form': form,
+                'count': queryset.count(),
+                'selected': request.POST.getlist(ACTION_CHECKBOX_NAME),
+                'select_across': request.POST.get('select_across') == '1',
+                'action': name,
+            }
+        )
+
+    admin_action.__name__ = name
+    admin_action.short_description = description
+    return admin_action
+
+
+move_to_group = form_action(
+    'move_to_group', 'Перенести в группу (фоном)',
+    MoveToGroupForm, BulkOperation.MOVE_TO_GROUP, 'group',
+)
+reassign_author = form_action(
+    'reassign_author', 'Сменить автора (фоном)',
+    ReassignAuthorForm, BulkOperation.REASSIGN_AUTHOR, 'author',
+)
+
+
+class ModerationAdmin(ScalableAdmin):
+    """Массовые действия выполняются фоном вместо delete_selected."""
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+
+class PostAdmin(ModerationAdmin):
+    actions = (bulk_delete, move_to_group, reassign_author)
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
+    # Фильтр даёт ограниченные диапазоны по индексу pub_date, а не
+    # date_hierarchy с выборкой всех различных дат по таблице.
     list_filter = ('pub_date',)
-    empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        """@username и #slug ищут по индексу автора и группы.
+
+        Остальные запросы ищутся по тексту поста полным просмотром.
+        """
+        if search_term.startswith('@'):
+            return queryset.filter(
+                author__username__startswith=search_term[1:]
+            ), False
+        if search_term.startswith('#'):
+            return queryset.filter(group__slug=search_term[1:]), False
+        return super().get_search_results(request, queryset, search_term)
 
-class FollowAdmin(admin.ModelAdmin):
+
+class ArchivedPostAdmin(ModerationAdmin):
+    actions = (bulk_delete,)
+    list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
+    search_fields = ('^author__username',)
+    readonly_fields = ('id', 'image_width', 'image_height')
+    list_filter = ('pub_date',)
+
+
+def delete_groups(modeladmin, request, queryset):
+    for group in queryset:
+        operation = schedule_group_deletion(group, request.user)
+        modeladmin.message_user(
+            request, f'Группа «{group}» скрыта, операция #{operation.pk} '
+            f'удалит её фоном.'
+        )
+
+
+delete_groups.short_description = 'Удалить группы (фоном)'
+
+
+class GroupAdmin(BackgroundDeletionAdmin, ModerationAdmin):
+    actions = (delete_groups,)
+    list_display = ('pk', 'title', 'slug')
+    search_fields = ('^slug', 'title')
+    prepopulated_fields = {'slug': ('title',)}
+
+    def schedule_deletion(self, request, obj):
+        schedule_group_deletion(obj, request.user)
+
+
+class CommentAdmin(ModerationAdmin):
+    actions = (bulk_delete, reassign_author)
+    list_display = ('pk', 'text', 'created', 'author', 'post')
+    list_select_related = ('author', 'post')
+    autocomplete_fields = ('author', 'post')
+    search_fields = ('^author__username',)
+
+
+class FollowAdmin(ModerationAdmin):
+    actions = (bulk_delete,)
     list_display = ('author', 'user')
-    search_fields = ('author',)
-    list_filter = ('author',)
-    empty_value_display = '-пусто-'
+    list_select_related = ('author', 'user')
+    autocomplete_fields = ('author', 'user')
+    search_fields = ('^author__username', '^user__username')
+
+
+class BulkOperationAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'status', 'progress', 'created', 'created_by')
+    list_filter = ('status',)
+    list_select_related = ('created_by',)
+    readonly_fields = (
+        'action', 'model', 'status', 'processed', 'total', 'error',
+        'created_by',
+    )
+    exclude = ('pk_ranges', 'params', 'cursor', 'worker', 'lease_until')
+
+    def progress(self, operation):
+        return f'{operation.processed} / {operation.total}'
+
+    progress.short_description = 'Прогресс'
+
+    def has_add_permission(self, request):
+        return False
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
-admin.site.register(Comment)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(ArchivedPost, ArchivedPostAdmin)
+admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow, FollowAdmin)
+admin.site.register(BulkOperation, BulkOperationAdmin)
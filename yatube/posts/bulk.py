@@ -0,0 +1,386 @@
+import bisect
+import datetime as dt
+import json
+import time
+import uuid
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from sorl.thumbnail import delete as delete_image
+from sorl.thumbnail.images import ImageFile
+
+from .cache import invalidate_author, invalidate_feeds, invalidate_posts
+from .models import (PENDING_DELETIONS_KEY, ArchivedComment, ArchivedPost,
+                     BulkOperation, Comment, Follow, Group, Post, User)
+
+
+class LeaseLost(Exception):
+    """Аренду операции перехватил другой воркер."""
+
+
+class StoredSelection:
+    """Выборка операции, сохранённая отрезками подряд идущих ключей.
+
+    Внутри отрезка все ключи были выбраны, поэтому новые записи в него
+    не попадут. Пачки читаются из таблицы по индексу первичного ключа.
+    """
+
+    def __init__(self, model, ranges):
+        self.model = model
+        self.ranges = ranges
+
+    def chunk_after(self, cursor, size):
+        pks = []
+        start = bisect.bisect_right([last for _, last in self.ranges], cursor)
+        for first, last in self.ranges[start:]:
+            pks += self.model._default_manager.filter(
+                pk__gte=max(first, cursor + 1), pk__lte=last
+            ).order_by('pk').values_list('pk', flat=True)[:size - len(pks)]
+            if len(pks) >= size:
+                break
+        return pks
+
+
+def chunk_after(selection, cursor, size):
+    """Первичные ключи следующей пачки после курсора."""
+    if isinstance(selection, StoredSelection):
+        return selection.chunk_after(cursor, size)
+    return list(selection.order_by('pk').filter(
+        pk__gt=cursor
+    ).values_list('pk', flat=True)[:size])
+
+
+def pk_ranges(pks):
+    """Отрезки [первый, последний] из возрастающих ключей и их число."""
+    ranges = []
+    count = 0
+    for pk in pks:
+        count += 1
+        if ranges and ranges[-1][1] == pk - 1:
+            ranges[-1][1] = pk
+        else:
+            ranges.append([pk, pk])
+    return ranges, count
+
+
+def enqueue(queryset, action, params=None, user=None):
+    """Ставит массовую операцию над выборкой в очередь.
+
+    Сохраняются отрезки ключей выбранных записей, а не сам запрос:
+    операция переживает обновление Django и изменения моделей.
+    """
+    ranges, total = pk_ranges(
+        queryset.order_by('pk').values_list('pk', flat=True).iterator()
+    )
+    return BulkOperation.objects.create(
+        action=action,
+        model=queryset.model._meta.label_lower,
+        pk_ranges=json.dumps(ranges),
+        params=json.dumps(params or {}),
+        total=total,
+        created_by=user,
+    )
+
+
+def operation_selection(operation):
+    return StoredSelection(
+        apps.get_model(operation.model), json.loads(operation.pk_ranges)
+    )
+
+
+def schedule_user_deletion(user, by=None):
+    """Сразу блокирует пользователя и скрывает его посты из лент.
+
+    Сами посты, комментарии, подписки и картинки удаляет воркер.
+    """
+    user.is_active = False
+    user.save(update_fields=['is_active'])
+    return BulkOperation.objects.create(
+        action=BulkOperation.DELETE_USER,
+        model=User._meta.label_lower,
+        params=json.dumps({'user': user.pk}),
+        total=sum(queryset.count() for queryset, _ in user_stages(user.pk)),
+        created_by=by,
+    )
+
+
+def schedule_group_deletion(group, by=None):
+    """Сразу скрывает группу; посты из неё воркер отвяжет пачками."""
+    return BulkOperation.objects.create(
+        action=BulkOperation.DELETE_GROUP,
+        model=Group._meta.label_lower,
+        params=json.dumps({'group': group.pk}),
+        total=sum(
+            queryset.count() for queryset, _ in group_stages(group.pk)
+        ),
+        created_by=by,
+    )
+
+
+# Комментарии постов и архивных постов.
+POST_COMMENTS = {Post: Comment, ArchivedPost: ArchivedComment}
+ARCHIVED_POST_FIELDS = (
+    'id', 'text', 'pub_date', 'author_id', 'group_id', 'image',
+    'image_width', 'image_height',
+)
+ARCHIVED_COMMENT_FIELDS = ('id', 'post_id', 'author_id', 'text', 'created')
+
+
+def post_image(name):
+    """Картинка поста для sorl: ключи миниатюр зависят от хранилища.
+
+    Строку sorl отнёс бы к default_storage и не нашёл бы миниатюры.
+    """
+    return ImageFile(name, Post._meta.get_field('image').storage)
+
+
+def delete_unused_images(names):
+    """Удаляет файлы и миниатюры картинок, на которые больше нет ссылок."""
+    used = set()
+    for model in POST_COMMENTS:
+        used.update(model.objects.filter(
+            image__in=names
+        ).values_list('image', flat=True))
+    for name in set(names) - used:
+        delete_image(post_image(name))
+
+
+def delete_chunk(model, pks, params):
+    if model in POST_COMMENTS:
+        # Комментарии удаляем отдельным запросом до постов, чтобы каскад
+        # не собирал их по одному.
+        POST_COMMENTS[model].objects.filter(post_id__in=pks).delete()
+        images = list(model.objects.filter(
+            pk__in=pks
+        ).exclude(image='').values_list('image', flat=True))
+        if images:
+            transaction.on_commit(lambda: delete_unused_images(images))
+    model._default_manager.filter(pk__in=pks).delete()
+
+
+def invalidate_chunk_caches(chunk, groups=(), authors=()):
+    """update() не шлёт сигналы: кеши затронутых постов сбрасываем сами."""
+    if chunk.model in POST_COMMENTS.values():
+        posts = set(chunk.values_list('post_id', flat=True))
+        transaction.on_commit(lambda: invalidate_posts(posts))
+        return
+    affected = list(chunk.values_list('pk', 'group_id', 'author_id'))
+    posts = {pk for pk, _, _ in affected}
+    groups = {group for _, group, _ in affected} | set(groups)
+    authors = {author for _, _, author in affected} | set(authors)
+    transaction.on_commit(lambda: [
+        invalidate_feeds(groups, authors), invalidate_posts(posts)
+    ])
+
+
+def unset_group_chunk(model, pks, params):
+    chunk = model._default_manager.filter(pk__in=pks)
+    invalidate_chunk_caches(chunk)
+    chunk.update(group=None)
+
+
+def move_chunk(model, pks, params):
+    chunk = model._default_manager.filter(pk__in=pks)
+    invalidate_chunk_caches(chunk, groups=[params['group']])
+    chunk.update(group_id=params['group'])
+
+
+def reassign_chunk(model, pks, params):
+    chunk = model._default_manager.filter(pk__in=pks)
+    old_authors = set(chunk.values_list('author_id', flat=True))
+    invalidate_chunk_caches(chunk, authors=[params['author']])
+    chunk.update(author_id=params['author'])
+    # update() не шлёт сигналы: счётчики авторов сбрасываем сами.
+    transaction.on_commit(lambda: [
+        invalidate_author(author_id)
+        for author_id in old_authors | {params['author']}
+    ])
+
+
+def archive_chunk(model, pks, params):
+    """Переносит посты с комментариями в архивные таблицы.
+
+    id сохраняются, картинки остаются на месте: архивный пост
+    ссылается на тот же файл.
+    """
+    posts = Post.objects.filter(pk__in=pks)
+    comments = Comment.objects.filter(post_id__in=pks)
+    ArchivedPost.objects.bulk_create(
+        ArchivedPost(**values)
+        for values in posts.values(*ARCHIVED_POST_FIELDS)
+    )
+    ArchivedComment.objects.bulk_create(
+        ArchivedComment(**values)
+        for values in comments.values(*ARCHIVED_COMMENT_FIELDS)
+    )
+    comments.delete()
+    posts.delete()
+
+
+HANDLERS = {
+    BulkOperation.DELETE: delete_chunk,
+    BulkOperation.MOVE_TO_GROUP: move_chunk,
+    BulkOperation.REASSIGN_AUTHOR: reassign_chunk,
+    BulkOperation.ARCHIVE: archive_chunk,
+}
+
+
+def user_stages(user_id):
+    return [
+        (Comment.objects.filter(author_id=user_id), delete_chunk),
+        (
+            Follow.objects.filter(Q(user_id=user_id) | Q(author_id=user_id)),
+            delete_chunk,
+        ),
+        (Post.objects.filter(author_id=user_id), delete_chunk),
+        (ArchivedComment.objects.filter(author_id=user_id), delete_chunk),
+        (ArchivedPost.objects.filter(author_id=user_id), delete_chunk),
+        # К этому моменту каскаду удалять почти нечего.
+        (User.objects.filter(pk=user_id), delete_chunk),
+    ]
+
+
+def group_stages(group_id):
+    return [
+        (Post.objects.filter(group_id=group_id), unset_group_chunk),
+        (
+            ArchivedPost.objects.filter(group_id=group_id),
+            unset_group_chunk,
+        ),
+        (Group.objects.filter(pk=group_id), delete_chunk),
+    ]
+
+
+def stages(operation):
+    """Этапы операции: пары (выборка, обработчик пачки)."""
+    params = json.loads(operation.params)
+    if operation.action == BulkOperation.DELETE_USER:
+        return user_stages(params['user'])
+    if operation.action == BulkOperation.DELETE_GROUP:
+        return group_stages(params['group'])
+    return [(operation_selection(operation), HANDLERS[operation.action])]
+
+
+def status_changed(operation):
+    """Сбрасывает кеш pending_deletions() при смене статуса удаления.
+
+    Статус часто меняется через update(), который не шлёт сигналов.
+    """
+    if operation.action in (
+        BulkOperation.DELETE_USER, BulkOperation.DELETE_GROUP
+    ):
+        cache.delete(PENDING_DELETIONS_KEY)
+        # Скрытые посты должны пропасть из всех лент или вернуться в них.
+        invalidate_feeds(everything=True)
+
+
+def claimable():
+    """Операции в очереди и прерванные, чья аренда истекла."""
+    return BulkOperation.objects.filter(
+        Q(status=BulkOperation.PENDING)
+        | Q(status=BulkOperation.RUNNING)
+        & (Q(lease_until__isnull=True) | Q(lease_until__lt=timezone.now()))
+    )
+
+
+def lease_until():
+    return timezone.now() + dt.timedelta(
+        seconds=settings.BULK_OPERATION_LEASE
+    )
+
+
+def claim(operation):
+    """Атомарно берёт операцию в аренду; False, если её уже выполняют."""
+    worker = uuid.uuid4().hex
+    claimed = claimable().filter(pk=operation.pk).update(
+        status=BulkOperation.RUNNING, worker=worker,
+        lease_until=lease_until(),
+    )
+    if not claimed:
+        return False
+    operation.refresh_from_db()
+    return True
+
+
+def save_progress(operation, *fields, release=False):
+    """Сохраняет поля операции и продлевает аренду.
+
+    Если аренду уже перехватили, бросает LeaseLost: внутри транзакции
+    пачки это откатывает и её изменения.
+    """
+    values = {field: getattr(operation, field) for field in fields}
+    saved = BulkOperation.objects.filter(
+        pk=operation.pk, worker=operation.worker
+    ).update(lease_until=None if release else lease_until(), **values)
+    if not saved:
+        raise LeaseLost(operation.pk)
+    if 'status' in values:
+        status_changed(operation)
+
+
+def run(operation, chunk_size=None, pause=None, max_chunks=None):
+    """Выполняет операцию пачками по chunk_size записей, этап за этапом.
+
+    Сначала операция берётся в аренду; если её уже выполняет другой
+    воркер, ничего не делает и возвращает False. Каждая пачка —
+    отдельная короткая транзакция, в которой вместе с изменениями
+    сохраняется курсор. Между пачками делается пауза, чтобы запись
+    не занимала SQLite целиком.
+    """
+    if not claim(operation):
+        return False
+    chunk_size = chunk_size or settings.BULK_OPERATION_CHUNK_SIZE
+    pause = settings.BULK_OPERATION_PAUSE if pause is None else pause
+    params = json.loads(operation.params)
+    operation_stages = stages(operation)
+    chunks = 0
+    while max_chunks is None or chunks < max_chunks:
+        if operation.stage >= len(operation_stages):
+            operation.status = BulkOperation.DONE
+            save_progress(operation, 'status', release=True)
+            return True
+        selection, handler = operation_stages[operation.stage]
+        pks = chunk_after(selection, operation.cursor, chunk_size)
+        if not pks:
+            operation.stage += 1
+            operation.cursor = 0
+            save_progress(operation, 'stage', 'cursor')
+            continue
+        with transaction.atomic():
+            handler(selection.model, pks, params)
+            operation.cursor = pks[-1]
+            operation.processed += len(pks)
+            save_progress(operation, 'cursor', 'processed')
+        chunks += 1
+        time.sleep(pause)
+    # Остановились по max_chunks: продолжить может любой воркер.
+    save_progress(operation, release=True)
+    return True
+
+
+def run_pending(**options):
+    """Выполняет все операции из очереди, включая прерванные.
+
+    Возвращает число операций, которые выполнял этот воркер.
+    """
+    done = 0
+    for operation in claimable().order_by('created'):
+        try:
+            if run(operation, **options):
+                done += 1
+        except LeaseLost:
+            continue
+        except Exception as error:
+            BulkOperation.objects.filter(
+                pk=operation.pk, worker=operation.worker
+            ).update(
+                status=BulkOperation.FAILED, error=repr(error),
+                lease_until=None,
+            )
+            status_changed(operation)
+            done += 1
+    return done
@@ -0,0 +1,211 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+
+from .models import ArchivedPost, Follow, Post, User
+
+AUTHOR_ID_KEY = 'posts:author_id:{}'
+AUTHOR_CARD_KEY = 'posts:author:{}'
+FEED_VERSION_KEY = 'posts:feed_version:{}'
+POST_KEY = 'posts:post:{}:{}'
+POST_VERSION_KEY = 'posts:post_version:{}'
+# Версии авторов и групп, которые лежат внутри закешированных постов.
+POST_AUTHOR_VERSION_KEY = 'posts:post_version:author:{}'
+POST_GROUP_VERSION_KEY = 'posts:post_version:group:{}'
+# Общая лента и «эпоха», смена которой сбрасывает сразу все ленты.
+ALL_POSTS = 'all'
+FEED_EPOCH = 'epoch'
+# Маркер отрицательного результата: такого пользователя нет.
+MISSING = 0
+
+
+def author_id_key(username):
+    return AUTHOR_ID_KEY.format(username)
+
+
+def author_card_key(author_id):
+    return AUTHOR_CARD_KEY.format(author_id)
+
+
+def invalidate_author(author_id, username=None):
+    keys = [author_card_key(author_id)]
+    if username is not None:
+        keys.append(author_id_key(username))
+    cache.delete_many(keys)
+
+
+def _get_author_id(username):
+    key = author_id_key(username)
+    author_id = cache.get(key)
+    if author_id is None:
+        author_id = User.objects.filter(
+            username=username
+        ).values_list('id', flat=True).first()
+        if author_id is None:
+            cache.set(key, MISSING, settings.AUTHOR_MISSING_CACHE_TIMEOUT)
+            raise Http404
+        cache.set(key, author_id, settings.AUTHOR_CACHE_TIMEOUT)
+    elif author_id == MISSING:
+        raise Http404
+    return author_id
+
+
+def get_author_card(username):
+    """Данные шапки профиля: id, имя и счётчики постов и подписчиков."""
+    author_id = _get_author_id(username)
+    key = author_card_key(author_id)
+    card = cache.get(key)
+    if card is None:
+        card = User.objects.filter(id=author_id).values(
+            'id', 'username', 'first_name', 'last_name'
+        ).first()
+        if card is None:
+            invalidate_author(author_id, username)
+            raise Http404
+        card['count'] = sum(
+            model.objects.filter(author_id=author_id).count()
+            for model in (Post, ArchivedPost)
+        )
+        card['count_followers'] = Follow.objects.filter(
+            author_id=author_id
+        ).count()
+        cache.set(key, card, settings.AUTHOR_CACHE_TIMEOUT)
+    if card['username'] != username:
+        # Пользователь переименован, а старое имя ещё лежит в кеше.
+        invalidate_author(author_id, username)
+        raise Http404
+    return card
+
+
+def get_author_or_404(username):
+    """Возвращает автора, собранного из кеша, и его карточку.
+
+    У экземпляра заполнены только id, username и имя: этого достаточно
+    для шаблонов и фильтров по автору.
+    """
+    card = get_author_card(username)
+    author = User(
+        id=card['id'],
+        username=card['username'],
+        first_name=card['first_name'],
+        last_name=card['last_name'],
+    )
+    author._state.adding = False
+    return author, card
+
+
+def feed_version(scope):
+    """Время последнего изменения ленты: ALL_POSTS, group:<id>, author:<id>.
+
+    Служит и версией закешированного XML, и основой ETag/Last-Modified.
+    Если ключ вытеснен из кеша, лента считается изменённой сейчас.
+    """
+    keys = [
+        FEED_VERSION_KEY.format(scope), FEED_VERSION_KEY.format(FEED_EPOCH)
+    ]
+    versions = cache.get_many(keys)
+    if len(versions) < len(keys):
+        now = time.time()
+        for key in set(keys) - set(versions):
+            cache.add(key, now, None)
+        versions = cache.get_many(keys)
+    return max(versions.values())
+
+
+def invalidate_feeds(groups=(), authors=(), everything=False):
+    """Отмечает изменение общей ленты и лент указанных групп и авторов."""
+    scopes = [ALL_POSTS]
+    scopes += [f'group:{pk}' for pk in groups if pk]
+    scopes += [f'author:{pk}' for pk in authors if pk]
+    if everything:
+        scopes.append(FEED_EPOCH)
+    now = time.time()
+    cache.set_many(
+        {FEED_VERSION_KEY.format(scope): now for scope in scopes}, None
+    )
+
+
+def post_versions(keys):
+    """Текущие версии по ключам; недостающие заводятся заново."""
+    versions = cache.get_many(keys)
+    if len(versions) < len(keys):
+        now = time.time()
+        for key in set(keys) - set(versions):
+            cache.add(key, now, settings.POST_CACHE_TIMEOUT)
+        versions = cache.get_many(keys)
+    return versions
+
+
+def post_version(post_id):
+    """Версия кеша поста: меняется при правке поста и его комментариев."""
+    key = POST_VERSION_KEY.format(post_id)
+    return post_versions([key]).get(key)
+
+
+def invalidate_posts(post_ids=(), authors=(), groups=()):
+    """Сбрасывает посты, а также посты с данными авторами и группами."""
+    now = time.time()
+    versions = {POST_VERSION_KEY.format(pk): now for pk in post_ids}
+    versions.update(
+        (POST_AUTHOR_VERSION_KEY.format(pk), now) for pk in authors
+    )
+    versions.update((POST_GROUP_VERSION_KEY.format(pk), now) for pk in groups)
+    cache.set_many(versions, settings.POST_CACHE_TIMEOUT)
+
+
+def load_post(post_id):
+    """Пост (или архивный пост) с автором, группой и комментариями."""
+    archived = False
+    post = Post.objects.select_related('author', 'group').filter(
+        pk=post_id
+    ).first()
+    if post is None:
+        archived = True
+        post = ArchivedPost.objects.select_related('author', 'group').filter(
+            pk=post_id
+        ).first()
+    if post is None:
+        return MISSING
+    limit = settings.POST_CACHED_COMMENTS
+    comments = list(
+        post.comments.select_related('author').order_by('pk')[:limit + 1]
+    )
+    # Версии всех авторов и группы, чьи данные попали в пост.
+    related = {POST_AUTHOR_VERSION_KEY.format(post.author_id)}
+    related.update(
+        POST_AUTHOR_VERSION_KEY.format(comment.author_id)
+        for comment in comments
+    )
+    if post.group_id is not None:
+        related.add(POST_GROUP_VERSION_KEY.format(post.group_id))
+    return {
+        'post': post,
+        'archived': archived,
+        'comments': comments[:limit],
+        'all_comments': len(comments) <= limit,
+        'related': post_versions(list(related)),
+    }
+
+
+def get_post_or_404(post_id):
+    """Закешированный пост: словарь post, archived, comments, all_comments.
+
+    Если у поста больше POST_CACHED_COMMENTS комментариев, в comments
+    лежат только первые из них, а all_comments ложно. В related —
+    версии авторов и группы на момент загрузки: если какая-то из них
+    сменилась, пост читается заново.
+    """
+    key = POST_KEY.format(post_id, post_version(post_id))
+    bundle = cache.get(key)
+    if bundle is None or bundle != MISSING and (
+            cache.get_many(list(bundle['related'])) != bundle['related']):
+        bundle = load_post(post_id)
+        cache.set(key, bundle, (
+            settings.POST_MISSING_CACHE_TIMEOUT if bundle == MISSING
+            else settings.POST_CACHE_TIMEOUT
+        ))
+    if bundle == MISSING:
+        raise Http404
+    return bundle
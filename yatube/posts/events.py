@@ -0,0 +1,11 @@
+from django.db import transaction
+
+from core.events import EventHub
+
+new_posts = EventHub('posts')
+
+
+def publish_new_post(post):
+    """После коммита сообщает подписчикам о новом посте."""
+    payload = {'post': post.pk, 'author': post.author_id}
+    transaction.on_commit(lambda: new_posts.publish(payload))
@@ -0,0 +1,158 @@
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse, reverse_lazy
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+from django.views.decorators.http import condition
+
+from core.cache import get_or_compute
+
+from .cache import ALL_POSTS, feed_version, get_author_or_404
+from .models import Group, Post, pending_deletions
+
+FEED_KEY = 'posts:feed:{name}:{host}:{scope}:{version}'
+
+
+class CachedFeed(Feed):
+    """Лента, которая отдаётся готовым XML из кеша.
+
+    XML кешируется под версией ленты, её же время служит ETag
+    и Last-Modified, так что опрос без изменений получает 304
+    без сборки ленты.
+    """
+
+    def scope(self, obj):
+        return ALL_POSTS
+
+    def __call__(self, request, *args, **kwargs):
+        obj = self.get_object(request, *args, **kwargs)
+        scope = self.scope(obj)
+        version = feed_version(scope)
+        key = FEED_KEY.format(
+            name=type(self).__name__, host=request.get_host(),
+            scope=scope, version=version,
+        )
+
+        @condition(
+            etag_func=lambda request: f'{scope}-{version!r}',
+            last_modified_func=lambda request: datetime.fromtimestamp(
+                version, timezone.utc
+            ),
+        )
+        def view(request):
+            def render():
+                response = super(CachedFeed, self).__call__(
+                    request, *args, **kwargs
+                )
+                return response['Content-Type'], response.content
+
+            # Новая версия ленты — новый ключ: после публикации поста
+            # XML пересобирает один воркер, остальные ждут его.
+            content_type, content = get_or_compute(
+                key, render, settings.FEED_CACHE_TIMEOUT
+            )
+            return HttpResponse(content, content_type=content_type)
+
+        return view(request)
+
+    def item_title(self, item):
+        return Truncator(item.text).chars(60)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=[item.pk])
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_categories(self, item):
+        return [item.group.title] if item.group else []
+
+
+class LatestPostsFeed(CachedFeed):
+    title = 'Yatube: последние записи'
+    link = reverse_lazy('posts:index')
+    description = 'Новые записи всех авторов Yatube'
+
+    def items(self):
+        return Post.objects.visible().select_related(
+            'author', 'group'
+        )[:settings.FEED_ITEMS]
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class GroupFeed(CachedFeed):
+    def get_object(self, request, slug):
+        group = get_object_or_404(Group, slug=slug)
+        if group.pk in pending_deletions()['groups']:
+            raise Http404
+        return group
+
+    def scope(self, group):
+        return f'group:{group.pk}'
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def link(self, group):
+        return reverse('posts:group_list', args=[group.slug])
+
+    def description(self, group):
+        return group.description
+
+    def items(self, group):
+        return Post.objects.visible().filter(group=group).select_related(
+            'author', 'group'
+        )[:settings.FEED_ITEMS]
+
+
+class GroupAtomFeed(GroupFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, group):
+        return group.description
+
+
+class AuthorFeed(CachedFeed):
+    def get_object(self, request, username):
+        author, card = get_author_or_404(username)
+        if author.pk in pending_deletions()['users']:
+            raise Http404
+        return author
+
+    def scope(self, author):
+        return f'author:{author.pk}'
+
+    def title(self, author):
+        return f'Yatube: {author.get_full_name() or author.username}'
+
+    def link(self, author):
+        return reverse('posts:profile', args=[author.username])
+
+    def description(self, author):
+        return f'Записи пользователя {author.username}'
+
+    def items(self, author):
+        return Post.objects.filter(author_id=author.pk).select_related(
+            'author', 'group'
+        )[:settings.FEED_ITEMS]
+
+
+class AuthorAtomFeed(AuthorFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, author):
+        return self.description(author)
@@ -1,6 +1,6 @@
 from django import forms
 
-from .models import Comment, Post
+from .models import Comment, Group, Post, User
 
 
 class PostForm(forms.ModelForm):
@@ -17,8 +17,34 @@ class PostForm(forms.ModelForm):
             'group': 'Группа, к которой будет относиться пост'
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['group'].queryset = Group.objects.cached()
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
         fields = {'text'}
+
+
+class MoveToGroupForm(forms.Form):
+    group = forms.SlugField(label='Слаг группы')
+
+    def clean_group(self):
+        group = Group.objects.filter(slug=self.cleaned_data['group']).first()
+        if group is None:
+            raise forms.ValidationError('Такой группы нет')
+        return group
+
+
+class ReassignAuthorForm(forms.Form):
+    author = forms.CharField(label='Имя пользователя нового автора')
+
+    def clean_author(self):
+        author = User.objects.filter(
+            username=self.cleaned_data['author']
+        ).first()
+        if author is None:
+            raise forms.ValidationError('Такого пользователя нет')
+        return author
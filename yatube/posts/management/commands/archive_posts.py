@@ -0,0 +1,42 @@
+import datetime as dt
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts import bulk
+from posts.models import BulkOperation, Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит посты старше --older-than дней с комментариями '
+        'в архивные таблицы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=int, default=settings.POST_ARCHIVE_AGE_DAYS,
+            help='Возраст поста в днях, после которого он уходит в архив.',
+        )
+        parser.add_argument(
+            '--enqueue', action='store_true',
+            help='Только поставить операцию в очередь run_bulk_operations.',
+        )
+        parser.add_argument('--chunk-size', type=int)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - dt.timedelta(days=options['older_than'])
+        queryset = Post.objects.filter(pub_date__lt=cutoff)
+        if not queryset.exists():
+            self.stdout.write('Архивировать нечего')
+            return
+        operation = bulk.enqueue(queryset, BulkOperation.ARCHIVE)
+        if options['enqueue']:
+            self.stdout.write(
+                f'Операция #{operation.pk} поставлена в очередь, '
+                f'постов: {operation.total}'
+            )
+            return
+        bulk.run(operation, chunk_size=options['chunk_size'])
+        self.stdout.write(f'В архив перенесено постов: {operation.processed}')
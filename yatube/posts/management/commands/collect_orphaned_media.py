@@ -0,0 +1,86 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from sorl.thumbnail import default
+from sorl.thumbnail import delete as delete_image
+
+from posts.bulk import post_image
+from posts.models import ArchivedPost, Post
+
+
+def iter_files(root):
+    """Рекурсивно обходит каталог через os.scandir, отдаёт DirEntry."""
+    try:
+        entries = os.scandir(root)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_files(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+def referenced_images():
+    referenced = set()
+    for model in (Post, ArchivedPost):
+        referenced.update(model.objects.exclude(image='').values_list(
+            'image', flat=True
+        ).iterator(chunk_size=5000))
+    return referenced
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет картинки постов, на которые не ссылается ни один пост, '
+        'вместе с их миниатюрами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, что будет удалено.',
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=60 * 60,
+            help='Не трогать файлы моложе стольких секунд: их могли '
+                 'загрузить, но ещё не сохранить пост.',
+        )
+        parser.add_argument(
+            '--rate', type=float, default=0,
+            help='Не больше стольких удалений в секунду '
+                 '(0 — без ограничения).',
+        )
+        parser.add_argument('--prefix', default='posts')
+        parser.add_argument(
+            '--cleanup-kvstore', action='store_true',
+            help='Также убрать из хранилища sorl-thumbnail записи '
+                 'об исчезнувших файлах.',
+        )
+
+    def handle(self, *args, **options):
+        referenced = referenced_images()
+        cutoff = time.time() - options['min_age']
+        delay = 1 / options['rate'] if options['rate'] else 0
+        found = 0
+        for entry in iter_files(
+            os.path.join(settings.MEDIA_ROOT, options['prefix'])
+        ):
+            name = os.path.relpath(entry.path, settings.MEDIA_ROOT)
+            name = name.replace(os.sep, '/')
+            if name in referenced or entry.stat().st_mtime > cutoff:
+                continue
+            found += 1
+            if options['dry_run']:
+                self.stdout.write(name)
+                continue
+            delete_image(post_image(name))
+            if delay:
+                time.sleep(delay)
+        if options['cleanup_kvstore'] and not options['dry_run']:
+            default.kvstore.cleanup()
+        verb = 'Найдено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(f'{verb} файлов без ссылок: {found}')
@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.sitemaps import write_sitemaps
+from posts.sitemaps import SITEMAPS
+
+
+class Command(BaseCommand):
+    help = (
+        'Пишет сжатые файлы sitemap по 50 000 адресов и индекс '
+        'sitemap.xml в SITEMAP_ROOT.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, а обновлять карту каждые --interval сек.',
+        )
+        parser.add_argument('--interval', type=float, default=60 * 60)
+
+    def handle(self, *args, **options):
+        while True:
+            shards = write_sitemaps(
+                SITEMAPS, settings.SITEMAP_ROOT, settings.SITEMAP_BASE_URL
+            )
+            for name, count in shards:
+                self.stdout.write(f'{name}: {count}')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
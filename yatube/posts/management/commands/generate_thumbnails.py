@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from core.thumbnails import generate_thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Заранее создаёт миниатюры картинок постов в пуле процессов; '
+        'несколько размеров рисуются из одного декодирования оригинала.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--geometry', action='append',
+            help='Размер миниатюры, можно указать несколько раз '
+                 '(по умолчанию 960x339, как в шаблонах).',
+        )
+        parser.add_argument('--crop', default='center')
+        parser.add_argument(
+            '--no-upscale', dest='upscale', action='store_false'
+        )
+        parser.add_argument(
+            '--workers', type=int,
+            help='Число процессов; 0 — в текущем процессе.',
+        )
+
+    def handle(self, *args, **options):
+        images = Post.objects.exclude(image='').order_by().values_list(
+            'image', flat=True
+        ).distinct()
+        field = Post._meta.get_field('image')
+        files = (
+            field.attr_class(None, field, name)
+            for name in images.iterator(chunk_size=2000)
+        )
+        created = sum(generate_thumbnails(
+            files,
+            options['geometry'] or ['960x339'],
+            workers=options['workers'],
+            crop=options['crop'],
+            upscale=options['upscale'],
+        ))
+        self.stdout.write(f'Создано миниатюр: {created}')
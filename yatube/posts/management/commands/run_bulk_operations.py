@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.bulk import run_pending
+
+
+class Command(BaseCommand):
+    help = 'Выполняет массовые операции модерации из очереди.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, а проверять очередь каждые --interval сек.',
+        )
+        parser.add_argument('--interval', type=float, default=5)
+        parser.add_argument('--chunk-size', type=int)
+
+    def handle(self, *args, **options):
+        while True:
+            done = run_pending(chunk_size=options['chunk_size'])
+            if done:
+                self.stdout.write(f'Выполнено операций: {done}')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
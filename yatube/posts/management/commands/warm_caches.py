@@ -0,0 +1,119 @@
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.urls import reverse
+
+from core.thumbnails import generate_thumbnails
+from core.warmup import warm_urls
+from posts.cache import get_author_card
+from posts.models import Group, Post, User, pending_deletions
+
+
+def paged(url, pages):
+    return [url] + [f'{url}?page={number}' for number in range(2, pages + 1)]
+
+
+def top_groups(limit):
+    return Group.objects.exclude(
+        pk__in=pending_deletions()['groups']
+    ).annotate(count=Count('posts')).order_by('-count').values_list(
+        'slug', flat=True
+    )[:limit]
+
+
+def top_authors(limit):
+    return User.objects.filter(is_active=True).exclude(
+        pk__in=pending_deletions()['users']
+    ).annotate(count=Count('users')).filter(count__gt=0).order_by(
+        '-count'
+    ).values_list('username', flat=True)[:limit]
+
+
+def top_posts(limit):
+    """Самые обсуждаемые посты: отдельного счётчика просмотров нет."""
+    return Post.objects.visible().annotate(
+        count=Count('comments')
+    ).order_by('-count', '-pub_date')[:limit]
+
+
+def warm_group(slug):
+    """Тот же запрос, что делает страница группы, — кладёт его в кеш."""
+    Group.objects.cached().get(slug=slug)
+
+
+class Command(BaseCommand):
+    """Прогревает кеши после выкладки.
+
+    Рендерит то, что кешируется целиком: первые страницы главной
+    (фрагмент ленты), RSS/Atom и страницы популярных постов с их
+    миниатюрами. Страницы групп и профилей отдаются потоком и не
+    кешируются, поэтому для них прогреваются только данные, которые
+    они читают из кеша: запрос группы и карточка автора.
+    """
+
+    help = (
+        'Прогревает кеши после выкладки: первые страницы главной, '
+        'RSS/Atom, популярные посты и их миниатюры, данные популярных '
+        'групп и авторов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, default=3,
+            help='Сколько первых страниц главной отрендерить.',
+        )
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--authors', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=100)
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Число потоков; 0 — по очереди в текущем потоке.',
+        )
+        parser.add_argument(
+            '--host', default=urlsplit(settings.SITEMAP_BASE_URL).netloc,
+            help='Host, под которым сайт видят посетители: он входит '
+                 'в ключи кеша лент.',
+        )
+
+    def handle(self, *args, **options):
+        pages = options['pages']
+        urls = paged(reverse('posts:index'), pages)
+        urls += [reverse('posts:feed_rss'), reverse('posts:feed_atom')]
+        warmed = 0
+        for slug in top_groups(options['groups']):
+            warm_group(slug)
+            warmed += 1
+            urls += [
+                reverse('posts:group_feed_rss', args=[slug]),
+                reverse('posts:group_feed_atom', args=[slug]),
+            ]
+        for username in top_authors(options['authors']):
+            get_author_card(username)
+            warmed += 1
+            urls += [
+                reverse('posts:profile_feed_rss', args=[username]),
+                reverse('posts:profile_feed_atom', args=[username]),
+            ]
+        posts = list(top_posts(options['posts']))
+        # Миниатюры рисуем заранее, чтобы страницы постов их не ждали.
+        created = sum(generate_thumbnails(
+            (post.image for post in posts), ['960x339'], workers=0,
+            crop='center', upscale=True,
+        ))
+        urls += [
+            reverse('posts:post_detail', args=[post.pk]) for post in posts
+        ]
+        failed = [
+            url for url, status in warm_urls(
+                urls, options['host'], options['workers']
+            )
+            if status != 200
+        ]
+        self.stdout.write(
+            f'Прогрето страниц: {len(urls) - len(failed)}, '
+            f'групп и авторов: {warmed}, миниатюр создано: {created}'
+        )
+        for url in failed:
+            self.stderr.write(f'Не удалось прогреть {url}')
@@ -0,0 +1,40 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0008_post_pub_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkOperation',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('action', models.CharField(choices=[('delete', 'Удаление'), ('move_to_group', 'Перенос в группу'), ('reassign_author', 'Смена автора')], max_length=32, verbose_name='Действие')),
+                ('model', models.CharField(max_length=100, verbose_name='Модель')),
+                ('pk_ranges', models.TextField(default='[]')),
+                ('params', models.TextField(default='{}')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('done', 'Завершена'), ('failed', 'Ошибка')], db_index=True, default='pending', max_length=16, verbose_name='Статус')),
+                ('cursor', models.PositiveIntegerField(default=0)),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Обработано')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Всего')),
+                ('error', models.TextField(blank=True)),
+                ('worker', models.CharField(blank=True, max_length=32)),
+                ('lease_until', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор операции')),
+            ],
+            options={
+                'verbose_name': 'массовая операция',
+                'verbose_name_plural': 'массовые операции',
+                'ordering': ['-created'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_bulkoperation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulkoperation',
+            name='stage',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='bulkoperation',
+            name='action',
+            field=models.CharField(choices=[('delete', 'Удаление'), ('move_to_group', 'Перенос в группу'), ('reassign_author', 'Смена автора'), ('delete_user', 'Удаление пользователя'), ('delete_group', 'Удаление группы')], max_length=32, verbose_name='Действие'),
+        ),
+    ]
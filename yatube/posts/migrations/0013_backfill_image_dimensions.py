@@ -0,0 +1,42 @@
+from django.core.files.images import get_image_dimensions
+from django.db import migrations, transaction
+
+CHUNK_SIZE = 500
+
+
+def backfill(apps, schema_editor):
+    """Заполняет размеры картинок пачками, каждая — своя транзакция."""
+    Post = apps.get_model('posts', 'Post')
+    storage = Post._meta.get_field('image').storage
+    last_pk = 0
+    while True:
+        chunk = list(
+            Post.objects.filter(
+                pk__gt=last_pk, image_width__isnull=True
+            ).exclude(image='').order_by('pk').only('pk', 'image')[:CHUNK_SIZE]
+        )
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+        for post in chunk:
+            try:
+                with storage.open(post.image.name) as image:
+                    width, height = get_image_dimensions(image)
+            except (OSError, ValueError, TypeError):
+                # Файла нет или он битый: размеры останутся пустыми.
+                width = height = None
+            post.image_width, post.image_height = width, height
+        with transaction.atomic():
+            Post.objects.bulk_update(chunk, ['image_width', 'image_height'])
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('posts', '0012_post_image_dimensions'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,56 @@
+import json
+
 from core.models import CreatedModel
+from core.querycache import CachingQuerySet
+from core.storage import ContentAddressedStorage
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.images import get_image_dimensions
 from django.db import models
 
 User = get_user_model()
 
+PENDING_DELETIONS_KEY = 'posts:pending_deletions'
+
+
+def pending_deletions():
+    """id пользователей и групп, ожидающих фонового удаления.
+
+    Пока их удаляет воркер, их контент скрыт из лент. Список маленький
+    и лежит в кеше, см. posts.signals.
+    """
+    pending = cache.get(PENDING_DELETIONS_KEY)
+    if pending is None:
+        pending = {'users': set(), 'groups': set()}
+        operations = BulkOperation.objects.filter(
+            action__in=(BulkOperation.DELETE_USER, BulkOperation.DELETE_GROUP)
+        ).filter(
+            status__in=(BulkOperation.PENDING, BulkOperation.RUNNING)
+        ).values_list('action', 'params')
+        for action, params in operations:
+            target = json.loads(params)
+            if action == BulkOperation.DELETE_USER:
+                pending['users'].add(target['user'])
+            else:
+                pending['groups'].add(target['group'])
+        cache.set(PENDING_DELETIONS_KEY, pending, None)
+    return pending
+
+
+class PostQuerySet(models.QuerySet):
+    def visible(self):
+        """Посты без авторов, ожидающих удаления."""
+        hidden = pending_deletions()['users']
+        return self.exclude(author_id__in=hidden) if hidden else self
+
+
+def image_dimensions(file):
+    """(ширина, высота) по заголовку картинки или (None, None)."""
+    try:
+        return get_image_dimensions(file)
+    except (OSError, ValueError, TypeError):
+        return None, None
+
 
 class Post(models.Model):
     text = models.TextField(
@@ -13,6 +60,7 @@ class Post(models.Model):
     pub_date = models.DateTimeField(
         verbose_name='Дата публикации',
         auto_now_add=True,
+        db_index=True,
     )
     author = models.ForeignKey(
         User,
@@ -32,8 +80,19 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True
     )
+    # Не width_field/height_field: те открывают файл при каждой загрузке
+    # поста из базы. Размеры пишутся в save() только для новой картинки.
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки', null=True, blank=True, editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        'Высота картинки', null=True, blank=True, editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         verbose_name_plural = 'записи'
@@ -42,12 +101,23 @@ class Post(models.Model):
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        if not self.image:
+            self.image_width = self.image_height = None
+        elif not self.image._committed:
+            self.image_width, self.image_height = image_dimensions(
+                self.image.file
+            )
+        super().save(*args, **kwargs)
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
 
+    objects = CachingQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'сообщество'
         verbose_name_plural = 'сообщества'
@@ -82,6 +152,75 @@ class Comment(CreatedModel):
         return self.text[:15]
 
 
+class ArchivedPost(models.Model):
+    """Старый пост, перенесённый из Post командой archive_posts.
+
+    Сохраняет исходный id: автоинкремент Post не выдаёт удалённые id
+    повторно, поэтому ссылки /posts/<id>/ продолжают работать.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст')
+    pub_date = models.DateTimeField('Дата публикации', db_index=True)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        models.SET_NULL,
+        related_name='archived_posts',
+        blank=True,
+        null=True,
+        verbose_name='Группа',
+    )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        storage=ContentAddressedStorage(),
+        blank=True
+    )
+    image_width = models.PositiveIntegerField(null=True, blank=True)
+    image_height = models.PositiveIntegerField(null=True, blank=True)
+    archived = models.DateTimeField('Дата архивации', auto_now_add=True)
+
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'архивная запись'
+        verbose_name_plural = 'архивные записи'
+        ordering = ['-pub_date']
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name='Комментарий',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+        verbose_name='Автор',
+    )
+    text = models.TextField('Текст')
+    created = models.DateTimeField('Дата создания')
+
+    class Meta:
+        verbose_name = 'архивный комментарий'
+        verbose_name_plural = 'архивные комментарии'
+
+    def __str__(self):
+        return self.text[:15]
+
+
 class Follow(models.Model):
     user = models.ForeignKey(
         User,
@@ -96,7 +235,78 @@ class Follow(models.Model):
         verbose_name='Автор'
     )
 
+    objects = CachingQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Подписчики'
         verbose_name_plural = 'Подписчики'
         ordering = ['author']
+
+
+class BulkOperation(CreatedModel):
+    """Массовая операция модерации, выполняемая фоном небольшими пачками.
+
+    Выборка хранится отрезками первичных ключей в JSON, прогресс — как
+    последний обработанный ключ, поэтому прерванную операцию можно
+    продолжить с того же места. Воркер берёт операцию в аренду
+    (worker, lease_until) и продлевает её с каждой пачкой; операцию
+    с истёкшей арендой подхватывает другой воркер.
+    """
+    DELETE = 'delete'
+    MOVE_TO_GROUP = 'move_to_group'
+    REASSIGN_AUTHOR = 'reassign_author'
+    DELETE_USER = 'delete_user'
+    DELETE_GROUP = 'delete_group'
+    ARCHIVE = 'archive'
+    ACTIONS = (
+        (DELETE, 'Удаление'),
+        (MOVE_TO_GROUP, 'Перенос в группу'),
+        (REASSIGN_AUTHOR, 'Смена автора'),
+        (DELETE_USER, 'Удаление пользователя'),
+        (DELETE_GROUP, 'Удаление группы'),
+        (ARCHIVE, 'Перенос в архив'),
+    )
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Завершена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    action = models.CharField('Действие', max_length=32, choices=ACTIONS)
+    model = models.CharField('Модель', max_length=100)
+    pk_ranges = models.TextField(default='[]')
+    params = models.TextField(default='{}')
+    status = models.CharField(
+        'Статус', max_length=16, choices=STATUSES, default=PENDING,
+        db_index=True,
+    )
+    # Удаление пользователя или группы идёт в несколько этапов,
+    # курсор относится к текущему этапу.
+    stage = models.PositiveSmallIntegerField(default=0)
+    cursor = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField('Обработано', default=0)
+    total = models.PositiveIntegerField('Всего', default=0)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=32, blank=True)
+    lease_until = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Автор операции',
+    )
+
+    class Meta:
+        verbose_name = 'массовая операция'
+        verbose_name_plural = 'массовые операции'
+        ordering = ['-created']
+
+    def __str__(self):
+        return f'{self.get_action_display()} {self.model} #{self.pk}'
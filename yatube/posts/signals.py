@@ -0,0 +1,135 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .bulk import status_changed
+from .cache import invalidate_author, invalidate_feeds, invalidate_posts
+from .events import publish_new_post
+from .models import (ArchivedComment, ArchivedPost, BulkOperation, Comment,
+                     Follow, Group, Post, User)
+
+# Поля, прежние значения которых нужны в post_save: у авторов и групп —
+# то, что показывается внутри закешированных постов, у поста — группа.
+TRACKED_FIELDS = {
+    User: ('username', 'first_name', 'last_name'),
+    Group: ('title', 'slug'),
+    Post: ('group_id',),
+}
+
+
+def tracked_fields(sender, instance):
+    # Отложенные поля не читаем, чтобы не делать лишних запросов.
+    return {
+        field: instance.__dict__.get(field)
+        for field in TRACKED_FIELDS[sender]
+    }
+
+
+@receiver(post_init, sender=User)
+@receiver(post_init, sender=Group)
+@receiver(post_init, sender=Post)
+def remember_tracked_fields(sender, instance, **kwargs):
+    instance._tracked_fields = tracked_fields(sender, instance)
+
+
+def fields_changed(sender, instance):
+    return tracked_fields(sender, instance) != instance._tracked_fields
+
+
+@receiver(post_save, sender=User)
+def invalidate_user(sender, instance, created, **kwargs):
+    # Вход пользователя обновляет только last_login: ни карточка,
+    # ни ленты от этого не меняются.
+    if created:
+        # Имя могло быть закешировано как несуществующее.
+        invalidate_author(instance.pk, instance.username)
+    elif fields_changed(sender, instance):
+        invalidate_author(
+            instance.pk, instance._tracked_fields['username']
+        )
+        invalidate_author(instance.pk, instance.username)
+        invalidate_feeds(authors=[instance.pk])
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user(sender, instance, **kwargs):
+    invalidate_author(instance.pk, instance.username)
+    invalidate_feeds(authors=[instance.pk])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_author_counters(sender, instance, **kwargs):
+    invalidate_author(instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    # При смене группы пост уходит и из ленты прежней группы.
+    invalidate_feeds(
+        groups={instance._tracked_fields['group_id'], instance.group_id},
+        authors=[instance.author_id],
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=ArchivedPost)
+@receiver(post_delete, sender=ArchivedPost)
+def invalidate_post(sender, instance, **kwargs):
+    invalidate_posts([instance.pk])
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=ArchivedComment)
+@receiver(post_delete, sender=ArchivedComment)
+def invalidate_comment_post(sender, instance, **kwargs):
+    invalidate_posts([instance.post_id])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Group)
+def invalidate_post_related(sender, instance, created, **kwargs):
+    # Новых авторов и групп в кеше ещё нет, а вход пользователя
+    # и прочие правки не меняют того, что видно в посте.
+    if not created and fields_changed(sender, instance):
+        invalidate_related(sender, instance)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Group)
+def invalidate_related(sender, instance, **kwargs):
+    if sender is User:
+        invalidate_posts(authors=[instance.pk])
+    else:
+        invalidate_posts(groups=[instance.pk])
+
+
+@receiver(post_save, sender=Post)
+def notify_new_post(sender, instance, created, **kwargs):
+    if created:
+        publish_new_post(instance)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_feed(sender, instance, **kwargs):
+    invalidate_feeds(groups=[instance.pk])
+
+
+@receiver(post_save, sender=BulkOperation)
+@receiver(post_delete, sender=BulkOperation)
+def invalidate_pending_deletions(sender, instance, **kwargs):
+    status_changed(instance)
+
+
+# Подключается последним: остальные обработчики post_save сравнивают
+# поля с сохранённым снимком, поэтому он обновляется после них.
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Group)
+@receiver(post_save, sender=Post)
+def refresh_tracked_fields(sender, instance, **kwargs):
+    instance._tracked_fields = tracked_fields(sender, instance)
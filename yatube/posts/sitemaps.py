@@ -0,0 +1,70 @@
+from django.db.models import Max
+from django.urls import reverse
+
+from core.sitemaps import KeysetSitemap
+
+from .models import ArchivedPost, Group, Post, User, pending_deletions
+
+
+class PostSitemap(KeysetSitemap):
+    fields = ('pub_date',)
+    changefreq = 'monthly'
+
+    def queryset(self):
+        return Post.objects.visible()
+
+    def location(self, item):
+        return reverse('posts:post_detail', args=[item[0]])
+
+    def lastmod(self, item):
+        return item[1]
+
+
+class ArchivedPostSitemap(PostSitemap):
+    changefreq = 'yearly'
+
+    def queryset(self):
+        return ArchivedPost.objects.visible()
+
+
+class GroupSitemap(KeysetSitemap):
+    fields = ('slug', 'last_post')
+    changefreq = 'daily'
+
+    def queryset(self):
+        return Group.objects.exclude(
+            pk__in=pending_deletions()['groups']
+        ).annotate(last_post=Max('posts__pub_date'))
+
+    def location(self, item):
+        return reverse('posts:group_list', args=[item[1]])
+
+    def lastmod(self, item):
+        return item[2]
+
+
+class ProfileSitemap(KeysetSitemap):
+    fields = ('username', 'last_post')
+    changefreq = 'daily'
+
+    def queryset(self):
+        # В карту попадают только авторы: профили без постов пусты.
+        return User.objects.filter(is_active=True).exclude(
+            pk__in=pending_deletions()['users']
+        ).annotate(
+            last_post=Max('users__pub_date')
+        ).filter(last_post__isnull=False)
+
+    def location(self, item):
+        return reverse('posts:profile', args=[item[1]])
+
+    def lastmod(self, item):
+        return item[2]
+
+
+SITEMAPS = {
+    'posts': PostSitemap,
+    'archive': ArchivedPostSitemap,
+    'groups': GroupSitemap,
+    'profiles': ProfileSitemap,
+}
@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class AdminChangelistTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def add_rows(self, start, count):
+        for number in range(start, start + count):
+            user = User.objects.create_user(username=f'user{number}')
+            post = Post.objects.create(
+                author=user, group=self.group, text=f'Пост {number}'
+            )
+            Comment.objects.create(post=post, author=user, text='Коммент')
+            Follow.objects.create(user=user, author=self.admin)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Число запросов списка не зависит от числа строк на странице."""
+        urls = [
+            reverse(f'admin:posts_{model}_changelist')
+            for model in ('post', 'comment', 'follow')
+        ]
+        self.add_rows(0, 2)
+        # Первый запрос прогревает кеш сессии и пользователя.
+        self.count_queries(urls[0])
+        before = [self.count_queries(url) for url in urls]
+        self.add_rows(2, 10)
+        after = [self.count_queries(url) for url in urls]
+        self.assertEqual(before, after)
+
+    def test_date_filter_does_not_scan_dates(self):
+        """Список постов не выбирает все различные даты публикации."""
+        self.add_rows(0, 2)
+        for model in ('post', 'archivedpost'):
+            with self.subTest(model=model):
+                url = reverse(f'admin:posts_{model}_changelist')
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(
+                        url, {'pub_date__gte': '2000-01-01'}
+                    )
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse([
+                    query for query in queries
+                    if 'DISTINCT' in query['sql']
+                    and 'pub_date' in query['sql']
+                ])
@@ -0,0 +1,86 @@
+import datetime as dt
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from posts.bulk import run, schedule_user_deletion
+from posts.models import ArchivedComment, ArchivedPost, Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(BULK_OPERATION_PAUSE=0)
+class ArchiveTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='Ivan')
+        self.client = Client()
+        self.client.force_login(self.author)
+        self.old = Post.objects.create(author=self.author, text='Старый пост')
+        Comment.objects.create(
+            post=self.old, author=self.author, text='Старый комментарий'
+        )
+        Post.objects.filter(pk=self.old.pk).update(
+            pub_date=timezone.now() - dt.timedelta(days=400)
+        )
+        self.fresh = [
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+            for number in range(10)
+        ]
+
+    def archive(self):
+        call_command('archive_posts', '--older-than=365', stdout=StringIO())
+
+    def test_old_posts_are_moved_with_comments(self):
+        self.archive()
+        self.assertFalse(Post.objects.filter(pk=self.old.pk).exists())
+        archived = ArchivedPost.objects.get(pk=self.old.pk)
+        self.assertEqual(archived.text, 'Старый пост')
+        self.assertEqual(
+            archived.pub_date.date(), (
+                timezone.now() - dt.timedelta(days=400)
+            ).date()
+        )
+        self.assertEqual(
+            list(archived.comments.values_list('text', flat=True)),
+            ['Старый комментарий'],
+        )
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(Post.objects.count(), 10)
+
+    def test_post_detail_falls_through_to_archive(self):
+        self.archive()
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.old.pk])
+        )
+        self.assertEqual(response.context['post'].text, 'Старый пост')
+        self.assertTrue(response.context['archived'])
+        self.assertEqual(response.context['count'], 11)
+        self.assertNotContains(
+            response, reverse('posts:add_comment', args=[self.old.pk])
+        )
+
+    def test_missing_post_is_404(self):
+        response = self.client.get(reverse('posts:post_detail', args=[999]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_profile_continues_into_archive(self):
+        self.archive()
+        url = reverse('posts:profile', args=['Ivan'])
+        first = self.client.get(url)
+        self.assertEqual(first.context['count'], 11)
+        self.assertEqual(first.context['page_obj'].paginator.num_pages, 2)
+        second = self.client.get(url, {'page': 2})
+        self.assertEqual(
+            [post.pk for post in second.context['page_obj']], [self.old.pk]
+        )
+
+    def test_user_deletion_removes_archive(self):
+        self.archive()
+        run(schedule_user_deletion(self.author))
+        self.assertFalse(ArchivedPost.objects.exists())
+        self.assertFalse(ArchivedComment.objects.exists())
@@ -0,0 +1,193 @@
+import json
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from posts.bulk import (LeaseLost, claim, enqueue, run, run_pending,
+                        save_progress, schedule_group_deletion,
+                        schedule_user_deletion)
+from posts.models import BulkOperation, Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class BulkOperationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        cls.author = User.objects.create_user(username='Ivan')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        for number in range(5):
+            post = Post.objects.create(
+                author=cls.author, text=f'Пост {number}'
+            )
+            Comment.objects.create(post=post, author=cls.author, text='Ком')
+
+    def test_delete_is_chunked_and_resumable(self):
+        """Удаление идёт пачками и продолжается с сохранённого курсора."""
+        operation = enqueue(Post.objects.all(), BulkOperation.DELETE)
+        self.assertEqual(operation.total, 5)
+        run(operation, chunk_size=2, pause=0, max_chunks=1)
+        operation.refresh_from_db()
+        self.assertEqual(operation.processed, 2)
+        self.assertEqual(operation.status, BulkOperation.RUNNING)
+        self.assertEqual(Post.objects.count(), 3)
+        run_pending(chunk_size=2, pause=0)
+        operation.refresh_from_db()
+        self.assertEqual(operation.status, BulkOperation.DONE)
+        self.assertEqual(operation.processed, 5)
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+
+    def test_selection_is_stored_as_pk_ranges(self):
+        """Выбранные ключи хранятся отрезками, пачки читаются из таблицы."""
+        pks = list(Post.objects.order_by('pk').values_list('pk', flat=True))
+        selected = pks[:2] + pks[3:]
+        operation = enqueue(
+            Post.objects.filter(pk__in=selected), BulkOperation.DELETE
+        )
+        self.assertEqual(operation.total, 4)
+        self.assertEqual(
+            json.loads(operation.pk_ranges),
+            [[pks[0], pks[1]], [pks[3], pks[4]]],
+        )
+        # Новая запись после постановки в очередь в выборку не попадает.
+        Post.objects.create(author=self.author, text='Новый пост')
+        run(operation, chunk_size=3, pause=0)
+        self.assertEqual(
+            list(Post.objects.values_list('text', flat=True)),
+            ['Новый пост', 'Пост 2'],
+        )
+
+    def test_operation_is_claimed_once(self):
+        """Операцию в аренде другой воркер не берёт, пока она не истечёт."""
+        operation = enqueue(Post.objects.all(), BulkOperation.DELETE)
+        self.assertTrue(claim(operation))
+        other = BulkOperation.objects.get(pk=operation.pk)
+        self.assertFalse(run(other, pause=0))
+        self.assertEqual(run_pending(pause=0), 0)
+        self.assertEqual(Post.objects.count(), 5)
+        BulkOperation.objects.filter(pk=operation.pk).update(
+            lease_until=timezone.now()
+        )
+        self.assertTrue(run(other, pause=0))
+        other.refresh_from_db()
+        self.assertEqual(other.processed, 5)
+        # Первый воркер потерял аренду и не может сохранить прогресс.
+        with self.assertRaises(LeaseLost):
+            save_progress(operation, 'processed')
+
+    def test_move_to_group_action(self):
+        """Админское действие ставит перенос в очередь, воркер выполняет."""
+        self.client.force_login(self.admin)
+        pks = list(Post.objects.values_list('pk', flat=True)[:3])
+        response = self.client.post(reverse('admin:posts_post_changelist'), {
+            'action': 'move_to_group',
+            '_selected_action': pks,
+            'select_across': '0',
+            'group': self.group.slug,
+            'apply': 'Поставить в очередь',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.group.posts.count(), 0)
+        run_pending(pause=0)
+        self.assertEqual(
+            set(self.group.posts.values_list('pk', flat=True)), set(pks)
+        )
+
+
+class ScheduledDeletionTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Ivan')
+        cls.reader = User.objects.create_user(username='Petr')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        cls.reader_post = Post.objects.create(
+            author=cls.reader, group=cls.group, text='Пост читателя'
+        )
+        for number in range(3):
+            post = Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {number}'
+            )
+            Comment.objects.create(post=post, author=cls.reader, text='Ком')
+        Comment.objects.create(
+            post=cls.reader_post, author=cls.author, text='Ком'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_user_deletion(self):
+        """Посты пользователя скрыты сразу, а удаляются воркером."""
+        schedule_user_deletion(self.author)
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(
+            list(response.context['page_obj']), [self.reader_post]
+        )
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'Ivan'})
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 3)
+        run_pending(chunk_size=2, pause=0)
+        self.assertFalse(User.objects.filter(username='Ivan').exists())
+        self.assertEqual(list(Post.objects.all()), [self.reader_post])
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+
+    def test_group_deletion(self):
+        """Группа скрыта сразу, посты отвязываются воркером."""
+        schedule_group_deletion(self.group)
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        self.assertEqual(
+            self.client.get(url).status_code, HTTPStatus.NOT_FOUND
+        )
+        run_pending(chunk_size=2, pause=0)
+        self.assertFalse(Group.objects.exists())
+        self.assertEqual(Post.objects.filter(group=None).count(), 4)
+
+    def test_failed_group_deletion_shows_group_again(self):
+        schedule_group_deletion(self.group)
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        self.assertEqual(
+            self.client.get(url).status_code, HTTPStatus.NOT_FOUND
+        )
+        with mock.patch(
+            'posts.bulk.unset_group_chunk', side_effect=RuntimeError
+        ):
+            run_pending(pause=0)
+        self.assertEqual(
+            BulkOperation.objects.get().status, BulkOperation.FAILED
+        )
+        self.assertEqual(self.client.get(url).status_code, HTTPStatus.OK)
+
+    def test_admin_delete_buttons_schedule_deletion(self):
+        """Кнопка «Удалить» на странице объекта тоже удаляет фоном."""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin)
+        for name, obj in (('posts_group', self.group),
+                          ('auth_user', self.author)):
+            with self.subTest(model=name):
+                url = reverse(f'admin:{name}_delete', args=[obj.pk])
+                self.assertEqual(self.client.get(url).status_code, 200)
+                response = self.client.post(url, {'post': 'yes'})
+                self.assertEqual(response.status_code, 302)
+                self.assertTrue(type(obj).objects.filter(pk=obj.pk).exists())
+        self.assertEqual(
+            set(BulkOperation.objects.values_list('action', flat=True)),
+            {BulkOperation.DELETE_GROUP, BulkOperation.DELETE_USER},
+        )
+        self.assertFalse(User.objects.get(pk=self.author.pk).is_active)
@@ -0,0 +1,134 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.cache import get_author_card, get_post_or_404
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class AuthorCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Ivan')
+        cls.follower = User.objects.create_user(username='Petr')
+        Post.objects.create(author=cls.author, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.follower)
+
+    def test_author_card_is_cached(self):
+        """Карточка автора кешируется вместе со счётчиками."""
+        card = get_author_card('Ivan')
+        self.assertEqual((card['count'], card['count_followers']), (1, 0))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_author_card('Ivan'), card)
+
+    def test_counters_are_invalidated(self):
+        """Новые пост и подписка сбрасывают карточку автора."""
+        get_author_card('Ivan')
+        Post.objects.create(author=self.author, text='Ещё один пост')
+        Follow.objects.create(user=self.follower, author=self.author)
+        card = get_author_card('Ivan')
+        self.assertEqual((card['count'], card['count_followers']), (2, 1))
+
+    def test_missing_username_is_404_and_cached(self):
+        """Несуществующий автор отдаёт 404, повторно БД не трогается."""
+        urls = (
+            reverse('posts:profile', kwargs={'username': 'nobody'}),
+            reverse('posts:profile_follow', kwargs={'username': 'nobody'}),
+            reverse('posts:profile_unfollow', kwargs={'username': 'nobody'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        with self.assertNumQueries(0):
+            with self.assertRaises(Http404):
+                get_author_card('nobody')
+        User.objects.create_user(username='nobody')
+        self.assertEqual(get_author_card('nobody')['username'], 'nobody')
+
+
+class PostCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Ivan')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.author)
+        self.url = reverse('posts:post_detail', args=[self.post.pk])
+
+    def test_post_detail_is_served_from_cache(self):
+        """Повторный просмотр поста не читает ни пост, ни комментарии."""
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['post'], self.post)
+        self.assertEqual(response.context['count'], 1)
+
+    def test_edit_and_comment_invalidate_post(self):
+        get_post_or_404(self.post.pk)
+        self.client.post(
+            reverse('posts:post_edit', args=[self.post.pk]),
+            {'text': 'Новый текст'},
+        )
+        self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Комментарий'},
+        )
+        bundle = get_post_or_404(self.post.pk)
+        self.assertEqual(bundle['post'].text, 'Новый текст')
+        self.assertEqual(
+            [comment.text for comment in bundle['comments']], ['Комментарий']
+        )
+        Comment.objects.all().delete()
+        self.assertEqual(get_post_or_404(self.post.pk)['comments'], [])
+
+    def test_missing_post_is_404_and_cached(self):
+        response = self.client.get(reverse('posts:post_detail', args=[999]))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        with self.assertNumQueries(0):
+            with self.assertRaises(Http404):
+                get_post_or_404(999)
+
+    def test_author_rename_refreshes_post(self):
+        get_post_or_404(self.post.pk)
+        self.author.first_name = 'Иван'
+        self.author.save()
+        bundle = get_post_or_404(self.post.pk)
+        self.assertEqual(bundle['post'].author.first_name, 'Иван')
+
+    def test_unrelated_changes_keep_post_cached(self):
+        get_post_or_404(self.post.pk)
+        User.objects.create_user(username='Petr')
+        Group.objects.create(title='Группа', slug='group')
+        self.author.last_login = self.author.date_joined
+        self.author.save()
+        with self.assertNumQueries(0):
+            get_post_or_404(self.post.pk)
+
+    def test_group_and_commenter_changes_refresh_post(self):
+        group = Group.objects.create(title='Группа', slug='group')
+        commenter = User.objects.create_user(username='Petr')
+        Post.objects.filter(pk=self.post.pk).update(group=group)
+        Comment.objects.create(
+            post=self.post, author=commenter, text='Комментарий'
+        )
+        get_post_or_404(self.post.pk)
+        group.title = 'Новая группа'
+        group.save()
+        commenter.username = 'Pavel'
+        commenter.save()
+        bundle = get_post_or_404(self.post.pk)
+        self.assertEqual(bundle['post'].group.title, 'Новая группа')
+        self.assertEqual(bundle['comments'][0].author.username, 'Pavel')
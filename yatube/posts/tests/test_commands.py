@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.signals import request_finished
+from django.db import close_old_connections
+from django.test import TestCase, override_settings
+from posts.bulk import delete_unused_images
+from posts.cache import get_author_card, get_post_or_404
+from posts.models import Group, Post
+from sorl.thumbnail import get_thumbnail
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class CollectOrphanedMediaTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        user = User.objects.create_user(username='Ivan')
+        self.post = Post.objects.create(
+            author=user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile('used.gif', SMALL_GIF, 'image/gif'),
+        )
+        self.orphan = os.path.join(TEMP_MEDIA_ROOT, 'posts', 'orphan.gif')
+        with open(self.orphan, 'wb') as orphan:
+            orphan.write(SMALL_GIF)
+        old = time.time() - 2 * 60 * 60
+        for path in (self.orphan, self.post.image.path):
+            os.utime(path, (old, old))
+
+    def test_dry_run_keeps_files(self):
+        out = StringIO()
+        call_command('collect_orphaned_media', '--dry-run', stdout=out)
+        self.assertIn('posts/orphan.gif', out.getvalue())
+        self.assertTrue(os.path.exists(self.orphan))
+
+    def test_orphans_are_deleted(self):
+        """Удаляются только файлы, на которые не ссылается ни один пост."""
+        call_command('collect_orphaned_media', stdout=StringIO())
+        self.assertFalse(os.path.exists(self.orphan))
+        self.assertTrue(os.path.exists(self.post.image.path))
+
+    def test_thumbnails_of_orphans_are_deleted(self):
+        thumbnail = get_thumbnail(self.post.image, '10x10')
+        thumbnail_path = os.path.join(TEMP_MEDIA_ROOT, thumbnail.name)
+        self.assertTrue(os.path.exists(thumbnail_path))
+        Post.objects.all().delete()
+        call_command('collect_orphaned_media', stdout=StringIO())
+        self.assertFalse(os.path.exists(self.post.image.path))
+        self.assertFalse(os.path.exists(thumbnail_path))
+
+    def test_bulk_delete_removes_thumbnails(self):
+        thumbnail = get_thumbnail(self.post.image, '10x10')
+        thumbnail_path = os.path.join(TEMP_MEDIA_ROOT, thumbnail.name)
+        Post.objects.all().delete()
+        delete_unused_images([self.post.image.name])
+        self.assertFalse(os.path.exists(self.post.image.path))
+        self.assertFalse(os.path.exists(thumbnail_path))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class WarmCachesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username='Ivan')
+        group = Group.objects.create(title='Группа', slug='group')
+        self.post = Post.objects.create(
+            author=user, group=group, text='Популярный пост'
+        )
+        # Как и тестовый клиент, не даём концу запроса закрыть
+        # соединение с тестовой базой.
+        request_finished.disconnect(close_old_connections)
+        self.addCleanup(request_finished.connect, close_old_connections)
+
+    # TestCase держит открытую транзакцию с записанными в setUp
+    # таблицами, а запросы к ним до коммита не кешируются.
+    @mock.patch('core.querycache.written_tables', return_value=set())
+    def test_pages_are_rendered_into_cache(self, written_tables):
+        out = StringIO()
+        call_command(
+            'warm_caches', '--workers=0', '--pages=1', '--host=testserver',
+            stdout=out, stderr=StringIO(),
+        )
+        # Страница главной, шесть лент и пост.
+        self.assertIn('Прогрето страниц: 8', out.getvalue())
+        self.assertIn('групп и авторов: 2', out.getvalue())
+        with self.assertNumQueries(0):
+            get_post_or_404(self.post.pk)
+            get_author_card('Ivan')
+            Group.objects.cached().get(slug='group')
@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.events import new_posts
+from posts.models import Follow
+
+User = get_user_model()
+
+
+@override_settings(
+    EVENTS_POLL_INTERVAL=0.01,
+    EVENTS_HEARTBEAT=0.05,
+    EVENTS_STREAM_LIFETIME=0.3,
+)
+class PostEventsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Ivan')
+        cls.other = User.objects.create_user(username='Petr')
+        cls.follower = User.objects.create_user(username='Anna')
+        Follow.objects.create(user=cls.follower, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.follower)
+
+    def read(self, feed):
+        response = self.client.get(
+            reverse('posts:post_events'), {'feed': feed}
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = iter(response.streaming_content)
+        next(stream)
+        new_posts.publish({'post': 1, 'author': self.other.pk})
+        new_posts.publish({'post': 2, 'author': self.author.pk})
+        return b''.join(stream).decode()
+
+    def test_follow_stream_counts_followed_authors_only(self):
+        body = self.read('follow')
+        self.assertIn('data: {"new": 1}', body)
+
+    def test_index_stream_counts_all_posts(self):
+        body = self.read('index')
+        self.assertIn('event: posts', body)
+        self.assertNotIn('data: {"new": 1}\n\nid', body)
+
+    def test_anonymous_follow_stream_is_closed(self):
+        self.client.logout()
+        response = self.client.get(
+            reverse('posts:post_events'), {'feed': 'follow'}
+        )
+        self.assertEqual(response.status_code, 204)
@@ -0,0 +1,110 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Ivan')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Первый пост'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_feeds_are_available(self):
+        urls = {
+            reverse('posts:feed_rss'): 'application/rss+xml',
+            reverse('posts:feed_atom'): 'application/atom+xml',
+            reverse('posts:group_feed_rss', args=['group']):
+                'application/rss+xml',
+            reverse('posts:group_feed_atom', args=['group']):
+                'application/atom+xml',
+            reverse('posts:profile_feed_rss', args=['Ivan']):
+                'application/rss+xml',
+            reverse('posts:profile_feed_atom', args=['Ivan']):
+                'application/atom+xml',
+        }
+        for url, content_type in urls.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertTrue(response['Content-Type'].startswith(
+                    content_type
+                ))
+                self.assertIn('Первый пост', response.content.decode())
+        response = self.client.get(
+            reverse('posts:group_feed_rss', args=['missing'])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_cached_feed_and_conditional_get(self):
+        """Повторный опрос берёт XML из кеша, а без изменений получает 304."""
+        url = reverse('posts:feed_rss')
+        response = self.client.get(url)
+        with self.assertNumQueries(0):
+            cached = self.client.get(url)
+        self.assertEqual(cached.content, response.content)
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(not_modified.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_new_post_invalidates_feeds(self):
+        urls = [
+            reverse('posts:feed_rss'),
+            reverse('posts:group_feed_rss', args=['group']),
+        ]
+        etags = [self.client.get(url)['ETag'] for url in urls]
+        Post.objects.create(
+            author=self.author, group=self.group, text='Второй пост'
+        )
+        for url, etag in zip(urls, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertIn('Второй пост', response.content.decode())
+
+    def test_group_change_invalidates_both_group_feeds(self):
+        other = Group.objects.create(title='Другая', slug='other')
+        urls = [
+            reverse('posts:group_feed_rss', args=['group']),
+            reverse('posts:group_feed_rss', args=['other']),
+        ]
+        for url in urls:
+            self.client.get(url)
+        self.client.force_login(self.author)
+        self.client.post(
+            reverse('posts:post_edit', args=[self.post.pk]),
+            {'text': 'Первый пост', 'group': other.pk},
+        )
+        self.assertNotIn(
+            'Первый пост', self.client.get(urls[0]).content.decode()
+        )
+        self.assertIn(
+            'Первый пост', self.client.get(urls[1]).content.decode()
+        )
+
+    def test_login_keeps_feeds_and_rename_invalidates(self):
+        url = reverse('posts:feed_rss')
+        etag = self.client.get(url)['ETag']
+        self.client.force_login(self.author)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.author.first_name = 'Иван'
+        self.author.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
@@ -1,3 +1,5 @@
+import hashlib
+import os
 import shutil
 import tempfile
 
@@ -76,12 +78,15 @@ class FormTestsCase(TestCase):
         )
         post = Post.objects.latest('id')
         self.assertEqual(Post.objects.count(), post_count + 1)
-        self.assertEqual(post.image, 'posts/small.gif')
+        digest = hashlib.sha256(small_gif).hexdigest()
+        image_name = f'posts/{digest[:2]}/{digest}.gif'
+        self.assertEqual(post.image, image_name)
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
         self.assertTrue(
             Post.objects.filter(
                 group=self.group,
                 text='Тестовая запись',
-                image='posts/small.gif',
+                image=image_name,
             ).exists()
         )
         response = self.authorized_client.post(
@@ -95,6 +100,23 @@ class FormTestsCase(TestCase):
             errors='Отправленный файл пуст.'
         )
 
+    def test_same_image_is_stored_once(self):
+        """Одинаковые картинки хранятся одним файлом с именем по хешу."""
+        content = 'GIF89a мем'.encode()
+        first, second = (
+            Post.objects.create(
+                author=self.user,
+                text='Мем',
+                image=SimpleUploadedFile(name, content, 'image/gif'),
+            )
+            for name in ('meme.gif', 'meme (1).GIF')
+        )
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(
+            os.listdir(os.path.dirname(first.image.path)),
+            [os.path.basename(first.image.name)]
+        )
+
     def test_create_post_edit(self):
         """Валидная форма изменяет запись в Post"""
         post_count = Post.objects.count()
@@ -0,0 +1,90 @@
+import gzip
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from posts.models import Group, Post
+from posts.sitemaps import PostSitemap
+
+TEMP_SITEMAP_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+@override_settings(
+    SITEMAP_ROOT=TEMP_SITEMAP_ROOT, SITEMAP_BASE_URL='https://yatube.test'
+)
+class SitemapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Ivan')
+        User.objects.create_user(username='silent')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f'Пост {number}')
+            for number in range(5)
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_SITEMAP_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def read_shard(self, name):
+        with gzip.open(os.path.join(TEMP_SITEMAP_ROOT, name), 'rt') as shard:
+            return shard.read()
+
+    @mock.patch('core.sitemaps.MAX_URLS', 2)
+    @mock.patch.object(PostSitemap, 'chunk_size', 2)
+    def test_sitemaps_are_sharded(self):
+        """Посты читаются пачками и делятся на файлы по MAX_URLS адресов."""
+        call_command('generate_sitemaps', stdout=StringIO())
+        names = sorted(os.listdir(TEMP_SITEMAP_ROOT))
+        self.assertEqual(names, [
+            'sitemap-groups-1.xml.gz',
+            'sitemap-posts-1.xml.gz',
+            'sitemap-posts-2.xml.gz',
+            'sitemap-posts-3.xml.gz',
+            'sitemap-profiles-1.xml.gz',
+            'sitemap.xml',
+        ])
+        posts = ''.join(
+            self.read_shard(f'sitemap-posts-{number}.xml.gz')
+            for number in (1, 2, 3)
+        )
+        for post in Post.objects.all():
+            self.assertIn(
+                'https://yatube.test'
+                + reverse('posts:post_detail', args=[post.pk]),
+                posts
+            )
+        profiles = self.read_shard('sitemap-profiles-1.xml.gz')
+        self.assertIn('/profile/Ivan/', profiles)
+        self.assertNotIn('silent', profiles)
+
+    def test_sitemaps_are_served_as_files(self):
+        call_command('generate_sitemaps', stdout=StringIO())
+        response = self.client.get('/sitemap.xml')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        index = b''.join(response.streaming_content).decode()
+        self.assertIn(
+            'https://yatube.test/sitemap-posts-1.xml.gz', index
+        )
+        response = self.client.get('/sitemap-posts-1.xml.gz')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn(
+            '<urlset',
+            gzip.decompress(b''.join(response.streaming_content)).decode()
+        )
+        response = self.client.get('/sitemap-missing-1.xml.gz')
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
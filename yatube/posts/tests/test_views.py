@@ -2,12 +2,15 @@ import shutil
 import tempfile
 import time
 from http import HTTPStatus
+from unittest import mock
 
 from django import forms
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from posts.models import Follow, Group, Post
 from posts.views import LIMIT
@@ -429,3 +432,54 @@ class FollowTest(TestCase):
             post_no_folower_count_before,
             post_no_folower_count_after,
         )
+
+
+class StreamingRenderTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Ivan')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, group=cls.group, text=f'Пост {number}')
+            for number in range(LIMIT + 3)
+        )
+
+    def test_streaming_matches_regular_render(self):
+        """Потоковый рендер ленты отдаёт ту же страницу по частям."""
+        urls = (
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user.username}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                expected = self.client.get(url).content
+                with self.settings(STREAMING_RENDER=True):
+                    response = self.client.get(url)
+                self.assertTrue(response.streaming)
+                chunks = list(response.streaming_content)
+                self.assertGreater(len(chunks), LIMIT)
+                self.assertEqual(b''.join(chunks), expected)
+
+    @override_settings(STREAMING_RENDER=True, STREAMING_BATCH_SIZE=4)
+    @mock.patch('core.templatetags.images.prefetch')
+    def test_posts_are_read_after_first_chunk(self, prefetch):
+        """Миниатюры достаются по пачкам, страница не читается заранее."""
+        response = self.client.get(
+            reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        )
+        chunks = iter(response.streaming_content)
+        with CaptureQueriesContext(connection) as queries:
+            next(chunks)
+        self.assertFalse(
+            [query for query in queries if 'posts_post' in query['sql']]
+        )
+        list(chunks)
+        self.assertEqual(
+            [len(call.args[0]) for call in prefetch.call_args_list],
+            [4, 4, LIMIT - 8],
+        )
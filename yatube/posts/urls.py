@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'posts'
 
@@ -8,6 +8,26 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path('feeds/rss/', feeds.LatestPostsFeed(), name='feed_rss'),
+    path('feeds/atom/', feeds.LatestPostsAtomFeed(), name='feed_atom'),
+    path(
+        'group/<slug:slug>/rss/', feeds.GroupFeed(), name='group_feed_rss'
+    ),
+    path(
+        'group/<slug:slug>/atom/',
+        feeds.GroupAtomFeed(),
+        name='group_feed_atom'
+    ),
+    path(
+        'profile/<str:username>/rss/',
+        feeds.AuthorFeed(),
+        name='profile_feed_rss'
+    ),
+    path(
+        'profile/<str:username>/atom/',
+        feeds.AuthorAtomFeed(),
+        name='profile_feed_atom'
+    ),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
@@ -17,6 +37,7 @@ urlpatterns = [
         name='add_comment',
     ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('events/', views.post_events, name='post_events'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
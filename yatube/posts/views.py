@@ -1,15 +1,25 @@
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.db import connection
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
+from core.coalesce import coalesce
+from core.events import event_stream
+from core.paginator import ChainedSequence
+from core.ratelimit import limit_writes
+from core.streaming import render_stream
+
+from .cache import get_author_card, get_author_or_404, get_post_or_404
+from .events import new_posts
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .models import ArchivedPost, Follow, Group, Post, pending_deletions
 
 LIMIT = 10
 
 
 def index(request):
-    post_list = Post.objects.all()
+    post_list = Post.objects.visible()
     paginator = Paginator(post_list, LIMIT)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
@@ -19,13 +29,16 @@ def index(request):
     )
 
 
+@coalesce
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_group = group.posts.all()
+    group = get_object_or_404(Group.objects.cached(), slug=slug)
+    if group.pk in pending_deletions()['groups']:
+        raise Http404
+    post_group = Post.objects.visible().filter(group=group)
     paginator = Paginator(post_group, LIMIT)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
-    return render(request, 'posts/group_list.html', {
+    return render_stream(request, 'posts/group_list.html', {
         'group': group,
         'page_obj': page_obj,
     }
@@ -33,45 +46,53 @@ def group_posts(request, slug):
 
 
 def profile(request, username):
-    author = User.objects.get(username=username)
-    post_author = Post.objects.select_related('author').filter(author=author)
+    author, card = get_author_or_404(username)
+    if author.pk in pending_deletions()['users']:
+        raise Http404
+    # Архивные посты старше любых оставшихся, поэтому идут следом.
+    post_author = ChainedSequence(*(
+        model.objects.select_related('author', 'group').filter(author=author)
+        for model in (Post, ArchivedPost)
+    ))
     paginator = Paginator(post_author, LIMIT)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
-    count = post_author.count()
-    count_followers = Follow.objects.filter(author=author).count()
-    if request.user.is_authenticated and Follow.objects.filter(
-            user=request.user,
-            author=author):
-        following = True
-    else:
-        following = False
+    following = request.user.is_authenticated and Follow.objects.filter(
+        user=request.user,
+        author=author
+    ).cached().exists()
     context = {
         'page_obj': page_obj,
         'author': author,
-        'count': count,
+        'count': card['count'],
         'following': following,
-        'count_followers': count_followers
+        'count_followers': card['count_followers']
     }
-    return render(request, 'posts/profile.html', context)
+    return render_stream(request, 'posts/profile.html', context)
 
 
+@coalesce
 def post_detail(request, post_id):
-    post = Post.objects.get(pk=post_id)
-    user = post.author
-    count = user.users.count()
-    comments = post.comments.all()
+    bundle = get_post_or_404(post_id)
+    post = bundle['post']
+    if post.author_id in pending_deletions()['users']:
+        raise Http404
+    comments = bundle['comments']
+    if not bundle['all_comments']:
+        comments = post.comments.select_related('author').order_by('pk')
     form = CommentForm(request.POST or None)
     context = {
         'post': post,
-        'count': count,
+        'count': get_author_card(post.author.username)['count'],
         'comments': comments,
-        'form': form
+        'form': form,
+        'archived': bundle['archived'],
     }
     return render(request, 'posts/post_detail.html', context)
 
 
 @login_required
+@limit_writes('post_create')
 def post_create(request):
     form = PostForm(
         request.POST or None,
@@ -106,6 +127,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@limit_writes('add_comment')
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
@@ -119,27 +141,64 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
+    post_list = Post.objects.visible().filter(
+        author__following__user=request.user
+    )
     paginator = Paginator(post_list, LIMIT)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     context = {
         'page_obj': page_obj,
     }
-    return render(request, 'posts/follow.html', context)
+    return render_stream(request, 'posts/follow.html', context)
 
 
 @login_required
+@limit_writes('profile_follow', methods=('GET', 'POST'))
 def profile_follow(request, username):
-    author = User.objects.get(username=username)
+    author, _ = get_author_or_404(username)
     if author != request.user:
         Follow.objects.get_or_create(user=request.user, author=author)
     return redirect("posts:profile", username)
 
 
 @login_required
+@limit_writes('profile_unfollow', methods=('GET', 'POST'))
 def profile_unfollow(request, username):
-    Follow.objects.filter(
-        user=request.user,
-        author__username=username).delete()
+    author, _ = get_author_or_404(username)
+    Follow.objects.filter(user=request.user, author=author).delete()
     return redirect("posts:profile", username)
+
+
+def post_events(request):
+    """SSE-поток «N новых постов» для главной (?feed=index) и подписок.
+
+    Пока соединение открыто, запрос не держит ни соединение с базой,
+    ни опрос кеша: он ждёт общего для процесса слушателя new_posts.
+    """
+    if request.GET.get('feed') == 'follow':
+        if not request.user.is_authenticated:
+            # 204 говорит EventSource не переподключаться.
+            return HttpResponse(status=204)
+        authors = set(Follow.objects.filter(
+            user=request.user
+        ).values_list('author_id', flat=True))
+
+        def accept(payload):
+            return payload['author'] in authors
+    else:
+        def accept(payload):
+            return True
+    connection.close()
+    try:
+        since = int(request.META['HTTP_LAST_EVENT_ID'])
+    except (KeyError, ValueError):
+        since = new_posts.current()
+    response = StreamingHttpResponse(
+        event_stream(new_posts, since, accept, 'posts'),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # nginx не должен копить события в буфере.
+    response['X-Accel-Buffering'] = 'no'
+    return response
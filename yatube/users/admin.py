@@ -1 +1,36 @@
-# Register your models here.
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+
+from core.admin import BackgroundDeletionAdmin
+from posts.bulk import schedule_user_deletion
+
+User = get_user_model()
+
+
+def delete_users(modeladmin, request, queryset):
+    for user in queryset.exclude(pk=request.user.pk):
+        operation = schedule_user_deletion(user, request.user)
+        modeladmin.message_user(
+            request, f'Пользователь {user} заблокирован, операция '
+            f'#{operation.pk} удалит его записи фоном.'
+        )
+
+
+delete_users.short_description = 'Удалить пользователей (фоном)'
+
+
+class YatubeUserAdmin(BackgroundDeletionAdmin, UserAdmin):
+    actions = (delete_users,)
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def schedule_deletion(self, request, obj):
+        schedule_user_deletion(obj, request.user)
+
+
+admin.site.unregister(User)
+admin.site.register(User, YatubeUserAdmin)
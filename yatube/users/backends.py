@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+USER_CACHE_KEY = 'auth:user:{}'
+
+
+def user_cache_key(user_id):
+    return USER_CACHE_KEY.format(user_id)
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя сессии из кеша.
+
+    Запись сбрасывается при любом сохранении пользователя, в том числе
+    при смене пароля, см. users.signals.
+    """
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
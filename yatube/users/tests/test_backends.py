@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from users.backends import CachedModelBackend
+
+User = get_user_model()
+
+
+class CachedModelBackendTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Ivan', password='pass')
+
+    def setUp(self):
+        cache.clear()
+        self.backend = CachedModelBackend()
+
+    def test_user_is_cached(self):
+        """Повторное чтение пользователя сессии не обращается к БД."""
+        self.backend.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.backend.get_user(self.user.pk), self.user)
+
+    def test_password_change_invalidates_cache(self):
+        """Смена пароля сбрасывает закешированного пользователя."""
+        self.backend.get_user(self.user.pk)
+        self.user.set_password('new-pass')
+        self.user.save()
+        with self.assertNumQueries(1):
+            user = self.backend.get_user(self.user.pk)
+        self.assertTrue(user.check_password('new-pass'))
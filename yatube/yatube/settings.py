@@ -50,24 +50,51 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.SessionCleanupMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
+# Отступы в HTML-шаблонах вырезаются один раз при загрузке шаблона.
+# Сжимаются только страницы с этими префиксами имён: шаблоны писем
+# (registration/, *_email.html) — простой текст.
+TEMPLATE_MINIFY_HTML = True
+TEMPLATE_MINIFY_PREFIXES = (
+    'base.html', 'about/', 'core/', 'includes/', 'posts/', 'users/',
+    'admin/',
+)
+# Ленты group_list, profile и follow отдаются потоком: шапка страницы
+# уходит клиенту сразу, посты — по мере чтения из базы. Потоковый ответ
+# нельзя закешировать целиком и у него нет response.content, поэтому
+# режим включается явно.
+STREAMING_RENDER = False
+# По сколько постов читается и готовится к рендеру поток внутри {% stream %}
+STREAMING_BATCH_SIZE = 5
+TEMPLATE_LOADERS = [
+    'core.loaders.FilesystemLoader',
+    'core.loaders.AppDirectoriesLoader',
+]
+if not DEBUG:
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -117,6 +144,67 @@ CACHES = {
     }
 }
 
+# Сессии читаются из кеша и только при промахе из БД.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+# Как часто (в секундах) удалять истёкшие сессии; None отключает очистку.
+SESSION_CLEANUP_INTERVAL = 60 * 60
+
+AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+USER_CACHE_TIMEOUT = 60 * 15
+
+# Кеш автора по username для profile/follow/unfollow и отдельно,
+# на меньший срок, отрицательных ответов для несуществующих имён.
+AUTHOR_CACHE_TIMEOUT = 60 * 5
+AUTHOR_MISSING_CACHE_TIMEOUT = 60
+
+# RSS/Atom: число записей в ленте и срок хранения готового XML. Ключ
+# включает версию ленты, поэтому новые посты видны сразу.
+FEED_ITEMS = 20
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Кеш страницы поста: пост с автором и группой и первые
+# POST_CACHED_COMMENTS комментариев; отдельно — несуществующие id.
+POST_CACHE_TIMEOUT = 60 * 60
+POST_MISSING_CACHE_TIMEOUT = 60
+POST_CACHED_COMMENTS = 100
+
+# Защита от одновременного пересчёта (core.cache.get_or_compute):
+# сколько секунд после срока отдаётся устаревшее значение, на сколько
+# берётся замок пересчёта и как часто его проверяют ждущие воркеры.
+CACHE_STALE_TIMEOUT = 60
+CACHE_LOCK_TIMEOUT = 10
+CACHE_LOCK_POLL_INTERVAL = 0.05
+
+# Объединение одинаковых анонимных запросов (core.coalesce): сколько
+# ждать первый такой запрос и можно ли объединять их между процессами.
+# Готовый ответ для других процессов хранится RESULT_TIMEOUT сек.
+COALESCE_TIMEOUT = 5
+COALESCE_ACROSS_PROCESSES = False
+COALESCE_RESULT_TIMEOUT = 2
+
+# Срок хранения результатов QuerySet.cached() по умолчанию; версии
+# таблиц сбрасывают их раньше, как только таблица изменится.
+QUERYSET_CACHE_TIMEOUT = 60 * 5
+
+# Прогрев кешей (manage.py warm_caches) при запуске WSGI-воркера.
+# Повторно прогрев запускается не раньше чем через LOCK_TIMEOUT сек.
+WARM_CACHES_ON_STARTUP = False
+WARM_CACHES_LOCK_TIMEOUT = 60 * 5
+
+# Карта сайта: команда generate_sitemaps пишет сюда sitemap.xml
+# и сжатые разделы; адреса в них строятся от SITEMAP_BASE_URL.
+SITEMAP_ROOT = os.path.join(BASE_DIR, 'sitemaps')
+SITEMAP_BASE_URL = 'http://localhost:8000'
+
+# SSE о новых постах: как часто слушатель процесса проверяет кеш,
+# интервал пингов, время жизни одного соединения и событий в кеше.
+# Под WSGI каждое соединение занимает поток; для тысяч клиентов
+# запускать gunicorn с gevent-воркерами.
+EVENTS_POLL_INTERVAL = 1
+EVENTS_HEARTBEAT = 15
+EVENTS_STREAM_LIFETIME = 60 * 10
+EVENTS_TTL = 60 * 5
+
 # Internationalization
 # https://docs.djangoproject.com/en/2.2/topics/i18n/
 
@@ -138,16 +226,80 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 
+# collectstatic хеширует имена и сохраняет рядом .gz и .br копии
+# (.br — через пакет Brotli из requirements.txt), которые отдаёт
+# core.middleware.StaticFilesMiddleware
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+
 # redirect url
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
-#  подключаем движок filebased.EmailBackend
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# письма складываются в очередь на диске и не блокируют запрос;
+# отправляет их команда send_queued_mail
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+EMAIL_QUEUE_PATH = os.path.join(BASE_DIR, 'mail_queue')
+# бэкенд, через который воркер доставляет письма из очереди
+EMAIL_QUEUE_DELIVERY_BACKEND = (
+    'django.core.mail.backends.filebased.EmailBackend'
+)
+EMAIL_QUEUE_BATCH_SIZE = 50
+EMAIL_QUEUE_MAX_ATTEMPTS = 5
+EMAIL_QUEUE_BACKOFF = 60
 # указываем директорию, в которую будут складываться файлы писем
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Если перед приложением стоит nginx или Apache, файлы из MEDIA_ROOT
+# отдаёт он: 'X-Accel-Redirect' (nginx, internal-локация по префиксу ниже)
+# или 'X-Sendfile'. None — отдавать из приложения через sendfile.
+MEDIA_SENDFILE_HEADER = None
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+
+# Метаданные миниатюр sorl-thumbnail: LRU в памяти процесса перед общим
+# кешем и БД; тег prefetch_thumbnails загружает их пачкой на страницу.
+THUMBNAIL_KVSTORE = 'core.thumbnails.KVStore'
+THUMBNAIL_BACKEND = 'core.thumbnails.ThumbnailBackend'
+# JPEG декодируется сразу в уменьшенном масштабе (draft), остальные
+# форматы перед фильтром сжимаются в целое число раз, пока картинка
+# больше результата в THUMBNAIL_REDUCING_GAP раз.
+THUMBNAIL_ENGINE = 'core.thumbnails.Engine'
+THUMBNAIL_REDUCING_GAP = 3.0
+THUMBNAIL_LRU_SIZE = 1000
+THUMBNAIL_LRU_TIMEOUT = 60
+
+# Допуск к пишущим представлениям: (burst, period) — не больше burst
+# запросов пользователя подряд, корзина наполняется за period секунд.
+# Корзины и слоты записи лежат в кеше default: общими для всех процессов
+# лимиты будут только с общим бэкендом (memcached, redis). С LocMemCache
+# выше каждый процесс считает их отдельно.
+WRITE_RATE_LIMITS = {
+    'post_create': (30, 60),
+    'add_comment': (60, 60),
+    'profile_follow': (60, 60),
+    'profile_unfollow': (60, 60),
+}
+# Сколько записей одновременно допускается; остальные ждут не дольше
+# WRITE_QUEUE_TIMEOUT сек., проверяя слоты каждые
+# WRITE_QUEUE_POLL_INTERVAL сек., и получают 503 с Retry-After.
+# Слот упавшего процесса освобождается через WRITE_SLOTS_TIMEOUT сек.
+WRITE_CONCURRENCY_LIMIT = 4
+WRITE_SLOTS_TIMEOUT = 60
+WRITE_QUEUE_TIMEOUT = 0.5
+WRITE_QUEUE_POLL_INTERVAL = 0.05
+WRITE_RETRY_AFTER = 2
+
+# Массовые операции модерации: размер пачки (одна транзакция)
+# и пауза между пачками в секундах
+BULK_OPERATION_CHUNK_SIZE = 500
+BULK_OPERATION_PAUSE = 0.05
+# Аренда операции воркером, сек.: продлевается с каждой пачкой,
+# после истечения операцию подхватывает другой воркер
+BULK_OPERATION_LEASE = 60 * 5
+
+# Посты старше стольких дней команда archive_posts переносит в архив
+POST_ARCHIVE_AGE_DAYS = 365
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
@@ -13,10 +13,13 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from core.views import serve_media, serve_sitemap
 
 urlpatterns = [
     path('auth/', include('users.urls')),
@@ -37,7 +40,15 @@ handler404 = 'core.views.page_not_found'
 handler403 = 'core.views.csrf_failure'
 handler500 = 'core.views.server_error'
 
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )
+urlpatterns += [
+    re_path(
+        r'^(?P<name>sitemap(-[\w-]+\.xml\.gz|\.xml))$',
+        serve_sitemap,
+        name='sitemap',
+    ),
+    re_path(
+        r'^%s(?P<path>.+)$' % re.escape(settings.MEDIA_URL.lstrip('/')),
+        serve_media,
+        name='media',
+    ),
+]
@@ -9,8 +9,17 @@ https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Воркер прогревает кеши до первого запроса; остальные воркеры,
+# запущенные одновременно с ним, прогрев пропускают.
+if settings.WARM_CACHES_ON_STARTUP and cache.add(
+        'warm_caches:lock', True, settings.WARM_CACHES_LOCK_TIMEOUT):
+    call_command('warm_caches')